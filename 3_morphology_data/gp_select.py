@@ -0,0 +1,230 @@
+from concurrent.futures import ProcessPoolExecutor
+from scipy.spatial.distance import pdist, squareform
+from scipy.optimize import minimize
+from scipy.linalg import cho_factor, cho_solve
+from typing import Optional, List
+import pandas as pd
+import numpy as np
+import time
+
+# Model selection for the morphology GP. Each candidate is a kernel family and
+# a noise level (alpha). The amplitude and length scale of each candidate are
+# found by maximizing the log marginal likelihood from several random starts.
+# All restarts are evaluated on one precomputed distance matrix.
+
+
+def _rbf(r, *args):
+    return np.exp(-0.5 * r ** 2)
+
+
+def _matern32(r, *args):
+    s = np.sqrt(3) * r
+    return (1 + s) * np.exp(-s)
+
+
+def _matern52(r, *args):
+    s = np.sqrt(5) * r
+    return (1 + s + s ** 2 / 3) * np.exp(-s)
+
+
+def _rational_quadratic(r, a):
+    return (1 + r ** 2 / (2 * a)) ** -a
+
+
+# Kernel families: (correlation function, number of extra log parameters)
+families = {
+    'rbf': (_rbf, 0),
+    'matern32': (_matern32, 0),
+    'matern52': (_matern52, 0),
+    'rational_quadratic': (_rational_quadratic, 1),
+}
+
+# Noise levels searched by default
+alphas = [1e-4, 1e-3, 1e-2, 1e-1]
+
+# Bounds on every log hyperparameter, matching the sklearn defaults
+log_bounds = (np.log(1e-5), np.log(1e5))
+
+# Shared by each worker process, set once by _init_worker
+_d: Optional[np.ndarray] = None
+_y: Optional[np.ndarray] = None
+
+
+def _init_worker(d: np.ndarray, y: np.ndarray):
+    """
+    Store the distance matrix and targets in a worker process.
+    :param d: Pairwise distance matrix of shape n x n
+    :param y: Targets of length n
+    :return: None
+    """
+    global _d, _y
+    _d = d
+    _y = y
+
+
+def _neg_lml(
+        theta: np.ndarray,
+        family: str,
+        alpha: float,
+) -> float:
+    """
+    The negative log marginal likelihood of a zero-mean GP.
+    :param theta: log(amplitude), log(length scale), then any extra log
+    parameters of the family.
+    :param family: The kernel family
+    :param alpha: The noise added to the diagonal
+    :return: float
+    """
+    f, _ = families[family]
+    amp, length, *extra = np.exp(theta)
+    k = amp * f(_d / length, *extra)
+    k[np.diag_indices_from(k)] += alpha
+    try:
+        c = cho_factor(k, lower=True)
+    except np.linalg.LinAlgError:
+        return np.inf
+    a = cho_solve(c, _y)
+    n = len(_y)
+    return 0.5 * _y @ a + np.log(np.diag(c[0])).sum() + 0.5 * n * np.log(2 * np.pi)
+
+
+def _restart(
+        family: str,
+        alpha: float,
+        theta0: np.ndarray,
+) -> tuple:
+    """
+    Run one optimizer start. Executed in a worker process.
+    :param family: The kernel family
+    :param alpha: The noise level
+    :param theta0: The starting log hyperparameters
+    :return: (log marginal likelihood, theta, seconds)
+    """
+    start = time.perf_counter()
+    res = minimize(
+        _neg_lml,
+        theta0,
+        args=(family, alpha),
+        method='L-BFGS-B',
+        bounds=[log_bounds] * len(theta0),
+    )
+    return -res.fun, res.x, time.perf_counter() - start
+
+
+def _kernel(family: str, theta: np.ndarray):
+    """
+    Build the fixed sklearn kernel equivalent to a family and parameters.
+    :param family: The kernel family
+    :param theta: The log hyperparameters
+    :return: An sklearn kernel
+    """
+    from sklearn import gaussian_process as gp
+    amp, length, *extra = np.exp(theta)
+    if family == 'rbf':
+        k = gp.kernels.RBF(length, length_scale_bounds='fixed')
+    elif family == 'matern32':
+        k = gp.kernels.Matern(length, length_scale_bounds='fixed', nu=1.5)
+    elif family == 'matern52':
+        k = gp.kernels.Matern(length, length_scale_bounds='fixed', nu=2.5)
+    else:
+        k = gp.kernels.RationalQuadratic(
+            length,
+            extra[0],
+            length_scale_bounds='fixed',
+            alpha_bounds='fixed',
+        )
+    return gp.kernels.ConstantKernel(amp, constant_value_bounds='fixed') * k
+
+
+def select(
+        x: np.ndarray,
+        y: np.ndarray,
+        kernels: Optional[List[str]] = None,
+        noise: Optional[List[float]] = None,
+        n_restarts: int = 8,
+        n_jobs: Optional[int] = None,
+        seed: int = 0,
+) -> tuple:
+    """
+    Search kernel families and noise levels for the GP that maximizes the log
+    marginal likelihood.
+    :param x: The inputs of shape n_samples x n_dimensions
+    :param y: The targets of length n_samples
+    :param kernels: The kernel families to search. If None, all are searched.
+    :param noise: The noise levels (alpha) to search. If None, alphas is used.
+    :param n_restarts: The number of optimizer starts per candidate. The first
+    start is always amplitude 1, length scale 1.
+    :param n_jobs: The number of worker processes. If 1, no pool is created.
+    If None, one worker per CPU is used.
+    :param seed: Seed for the random starts
+    :return: (fitted GaussianProcessRegressor, DataFrame of candidates sorted
+    by log marginal likelihood)
+    """
+
+    kernels = list(families) if kernels is None else kernels
+    noise = alphas if noise is None else noise
+    y = np.asarray(y, dtype=float).ravel()
+
+    # Compute the distance matrix once for every restart
+    d = squareform(pdist(x))
+
+    # Create every (candidate, start) task
+    rng = np.random.default_rng(seed)
+    tasks = []
+    for family in kernels:
+        n_theta = 2 + families[family][1]
+        starts = rng.uniform(np.log(1e-2), np.log(1e2), size=(n_restarts, n_theta))
+        starts[0] = 0
+        for alpha in noise:
+            for theta0 in starts:
+                tasks.append((family, alpha, theta0))
+
+    # Evaluate the restarts, concurrently if requested
+    if n_jobs == 1:
+        _init_worker(d, y)
+        results = [_restart(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(
+                max_workers=n_jobs,
+                initializer=_init_worker,
+                initargs=(d, y),
+        ) as pool:
+            results = list(pool.map(_restart, *zip(*tasks)))
+
+    # Keep the best restart of each candidate
+    df = pd.DataFrame({
+        'family': [t[0] for t in tasks],
+        'alpha': [t[1] for t in tasks],
+        'lml': [r[0] for r in results],
+        'theta': [r[1] for r in results],
+        'time': [r[2] for r in results],
+    })
+    best = df.loc[df.groupby(['family', 'alpha'])['lml'].idxmax()]
+    best = best.drop(columns='time').merge(
+        df.groupby(['family', 'alpha'], as_index=False)['time'].sum(),
+        on=['family', 'alpha'],
+    )
+    best['amplitude'] = [np.exp(t[0]) for t in best['theta']]
+    best['length_scale'] = [np.exp(t[1]) for t in best['theta']]
+    best = best.sort_values('lml', ascending=False).reset_index(drop=True)
+
+    # Refit the winning candidate with sklearn, without further optimization
+    from sklearn import gaussian_process as gp
+    top = best.iloc[0]
+    model = gp.GaussianProcessRegressor(
+        kernel=_kernel(top['family'], top['theta']),
+        alpha=top['alpha'],
+        optimizer=None,
+    )
+    model.fit(x, y)
+
+    return model, best.drop(columns='theta')
+
+
+if __name__ == '__main__':
+    from morphology_data import prepare_data
+    _, x_data, y_data, _ = prepare_data()
+    start_time = time.perf_counter()
+    gp_model, df_candidates = select(x_data, y_data)
+    print(df_candidates.to_string())
+    print(f'Selected {gp_model.kernel_} in {time.perf_counter() - start_time:.2f} s')
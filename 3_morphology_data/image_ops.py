@@ -0,0 +1,232 @@
+import time
+import numpy as np
+
+# In-place, dtype-preserving image kernels. Images are processed in blocks of
+# rows so that the float scratch space stays bounded for large frames. Integer
+# results are rounded to the nearest value. Images must be writeable: copy
+# frames from read-only sources such as mpimg.imread first.
+
+# Size of the float scratch buffer used per tile (bytes)
+tile_bytes = 4 * 1024 ** 2
+
+
+def _saturation(dtype: np.dtype) -> float:
+    """
+    Get the value that represents full brightness for a dtype.
+    :param dtype: The image dtype
+    :return: The maximum value
+    """
+    if np.issubdtype(dtype, np.integer):
+        return float(np.iinfo(dtype).max)
+    return 1.0
+
+
+def _tiles(img: np.ndarray):
+    """
+    Iterate over blocks of rows of an image.
+    :param img: The image of shape rows x columns (x channels)
+    :return: A generator of views into img
+    """
+    row_bytes = max(img[:1].size * 4, 1)
+    rows = max(tile_bytes // row_bytes, 1)
+    for start in range(0, img.shape[0], rows):
+        yield img[start:start + rows]
+
+
+def _scratch(img: np.ndarray) -> np.ndarray:
+    """
+    Allocate the float32 scratch space for one tile of an image.
+    :param img: The image
+    :return: A flat float32 array
+    """
+    tile = next(_tiles(img), img)
+    return np.empty(tile.size, dtype=np.float32)
+
+
+def brighten(
+        img: np.ndarray,
+        scale: float,
+) -> np.ndarray:
+    """
+    Scale the brightness of an image in place, saturating at full brightness.
+    :param img: The image. Integer images saturate at the dtype maximum, float
+    images saturate at 1.
+    :param scale: The brightness multiplier
+    :return: img
+    """
+
+    top = _saturation(img.dtype)
+
+    # Float images can be scaled directly
+    if not np.issubdtype(img.dtype, np.integer):
+        for tile in _tiles(img):
+            np.multiply(tile, scale, out=tile)
+            np.clip(tile, 0, top, out=tile)
+        return img
+
+    # Integer images are scaled through a float32 scratch tile
+    scratch = _scratch(img)
+    for tile in _tiles(img):
+        buf = scratch[:tile.size].reshape(tile.shape)
+        np.multiply(tile, scale, out=buf)
+        np.clip(buf, 0, top, out=buf)
+        np.rint(buf, out=buf)
+        np.copyto(tile, buf, casting='unsafe')
+    return img
+
+
+def gamma(
+        img: np.ndarray,
+        g: float,
+) -> np.ndarray:
+    """
+    Apply a gamma curve to an image in place.
+    :param img: The image
+    :param g: The gamma exponent. Values below 1 brighten the mid-tones.
+    :return: img
+    """
+
+    top = _saturation(img.dtype)
+
+    # Small unsigned images use a lookup table of every possible value
+    if np.issubdtype(img.dtype, np.integer) and img.dtype.itemsize <= 2 and img.dtype.kind == 'u':
+        lut = np.arange(top + 1, dtype=np.float64) / top
+        lut = np.rint(lut ** g * top).astype(img.dtype)
+        for tile in _tiles(img):
+            np.take(lut, tile, out=tile)
+        return img
+
+    # Float images already span 0 to 1, so they can be raised directly
+    if not np.issubdtype(img.dtype, np.integer):
+        for tile in _tiles(img):
+            np.clip(tile, 0, top, out=tile)
+            np.power(tile, g, out=tile)
+        return img
+
+    # Wide and signed integer images go through the scratch tile. Negative
+    # values are clipped to 0, as for float images.
+    scratch = _scratch(img)
+    for tile in _tiles(img):
+        buf = scratch[:tile.size].reshape(tile.shape)
+        np.divide(tile, top, out=buf)
+        np.maximum(buf, 0, out=buf)
+        np.power(buf, g, out=buf)
+        np.multiply(buf, top, out=buf)
+        np.rint(buf, out=buf)
+        np.copyto(tile, buf, casting='unsafe')
+    return img
+
+
+def percentiles(
+        img: np.ndarray,
+        lower: float = 1,
+        upper: float = 99,
+        n_sample: int = 1_000_000,
+) -> tuple:
+    """
+    Find the lower and upper percentile values of an image without copying it.
+    Integer images of 8 or 16 bits are histogrammed exactly, tile by tile.
+    Other images are estimated from an evenly strided sample of pixels.
+    :param img: The image
+    :param lower: The lower percentile (0 to 100)
+    :param upper: The upper percentile (0 to 100)
+    :param n_sample: The number of values sampled for non-histogram dtypes
+    :return: (low, high)
+    """
+
+    # Exact: accumulate a histogram of every value
+    if np.issubdtype(img.dtype, np.integer) and img.dtype.itemsize <= 2 and img.dtype.kind == 'u':
+        counts = np.zeros(int(_saturation(img.dtype)) + 1, dtype=np.int64)
+        for tile in _tiles(img):
+            counts += np.bincount(tile.ravel(), minlength=counts.size)
+        cdf = np.cumsum(counts)
+        targets = np.array([lower, upper]) / 100 * (cdf[-1] - 1)
+        low, high = np.searchsorted(cdf, targets, side='right')
+        return float(low), float(high)
+
+    # Approximate: sample the flattened image at a fixed stride
+    flat = img.reshape(-1)
+    step = max(flat.size // n_sample, 1)
+    low, high = np.percentile(flat[::step], [lower, upper])
+    return float(low), float(high)
+
+
+def normalize(
+        img: np.ndarray,
+        lower: float = 1,
+        upper: float = 99,
+) -> np.ndarray:
+    """
+    Stretch an image in place so that the lower and upper percentiles span the
+    full brightness range.
+    :param img: The image
+    :param lower: The percentile mapped to black (0 to 100)
+    :param upper: The percentile mapped to full brightness (0 to 100)
+    :return: img
+    """
+
+    top = _saturation(img.dtype)
+    low, high = percentiles(img, lower, upper)
+    if high <= low:
+        return img
+    scale = top / (high - low)
+
+    # Float images can be stretched directly
+    if not np.issubdtype(img.dtype, np.integer):
+        for tile in _tiles(img):
+            np.subtract(tile, low, out=tile)
+            np.multiply(tile, scale, out=tile)
+            np.clip(tile, 0, top, out=tile)
+        return img
+
+    # Integer images are stretched through the scratch tile
+    scratch = _scratch(img)
+    for tile in _tiles(img):
+        buf = scratch[:tile.size].reshape(tile.shape)
+        np.subtract(tile, low, out=buf)
+        np.multiply(buf, scale, out=buf)
+        np.clip(buf, 0, top, out=buf)
+        np.rint(buf, out=buf)
+        np.copyto(tile, buf, casting='unsafe')
+    return img
+
+
+def benchmark(
+        shape: tuple = (4096, 4096, 3),
+        repeat: int = 5,
+):
+    """
+    Print the throughput of each kernel in MB/s of image processed.
+    :param shape: The shape of the synthetic uint8 image
+    :param repeat: The number of timed runs per kernel
+    :return: None
+    """
+
+    rng = np.random.default_rng(0)
+    img = rng.integers(0, 256, size=shape, dtype=np.uint8)
+    mb = img.nbytes / 1024 ** 2
+
+    def legacy(a):
+        # The original brightening step in morphology_data.run
+        scaled = a / 255 * 1.75
+        return np.where(scaled < 1, scaled, 1)
+
+    kernels = {
+        'legacy brighten (float64 copy)': legacy,
+        'brighten': lambda a: brighten(a, 1.75),
+        'gamma': lambda a: gamma(a, 0.8),
+        'normalize': lambda a: normalize(a),
+    }
+
+    for name, kernel in kernels.items():
+        times = []
+        for _ in range(repeat):
+            work = img.copy()
+            start = time.perf_counter()
+            kernel(work)
+            times.append(time.perf_counter() - start)
+        print(f'{name:>32}: {mb / min(times):8.1f} MB/s')
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -1,13 +1,18 @@
 import os
+from typing import Optional
 import pandas as pd
 import numpy as np
-from sklearn import gaussian_process as gp
 import matplotlib.pyplot as plt
 from matplotlib import colorbar
 import matplotlib.image as mpimg
 from matplotlib.offsetbox import AnnotationBbox, OffsetImage
 import matplotlib.patches as mpatches
-import matplotlib as mpl
+from image_ops import brighten
+from gp_select import select
+
+from common.contour import surface
+from common.output import Sink, FileSink
+from common.style import Style
 
 # Shut up Pandas
 pd.options.mode.chained_assignment = None
@@ -17,53 +22,28 @@ pd.options.mode.chained_assignment = None
 # sample_{str(img).zfill(3)}/spincoated_slide_after_annealing1.jpg
 
 render_images = True
+select_model = False
 pd.set_option("display.max_columns", 100)
 
-font = {
-    'family': 'arial',
-    'size': 14,
-}
-mpl.rc('font', **font)
+style = Style({
+    'font.family': 'arial',
+    'font.size': 14,
+})
 
 
-def run():
+def prepare_data(
+        ax_0: str = 'ratio_round',
+        ax_1: str = 'anneal',
+        ax_2: str = 'Quality',
+) -> tuple:
     """
-    Create a single plot comparing mobility and image quality.
-    :return: None
+    Read the morphology data and normalize the domain for fitting.
+    :param ax_0: The column of the first input dimension
+    :param ax_1: The column of the second input dimension
+    :param ax_2: The column of the target
+    :return: (df_plot, x, y, (x0_min, x0_range, x1_min, x1_range))
     """
 
-    # Define some global constants
-    ax_0 = 'ratio_round'
-    ax_1 = 'anneal'
-    res = 100
-    levels = 10
-    x0_buffer = 0.1
-    x1_buffer = 0.1
-
-    # Plotting configurations
-    cmap = 'plasma_r'
-    bar_cmap = 'plasma'
-    ax_2 = 'Quality'
-    bar_label = r'Dewetting score ($S_{dewet}$)'
-    bar_bounds = ['Poor', 'Good']
-    bar_label_offset = -25
-    alpha_quality = 1e-3
-
-    # Create the matplotlib objects
-    figure: plt.Figure = plt.figure(figsize=(9, 6), dpi=400)
-
-    ax_qual: plt.Axes = plt.subplot2grid((12, 65), (2, 3), colspan=35, rowspan=8)
-    ax_qual_c: plt.Axes = plt.subplot2grid((12, 65), (2, 44), rowspan=8)
-    ax_arrows: plt.Axes = plt.subplot2grid((1, 65), (0, 45), colspan=8)
-    ax_images: plt.Axes = plt.subplot2grid((1, 65), (0, 54), colspan=10)
-
-    figure.subplots_adjust(
-        left=0.05,
-        right=0.98,
-        top=0.98,
-        bottom=0.02,
-    )
-
     # Import the data
     df_quality = pd.read_csv('morphology_data.csv')
 
@@ -84,7 +64,7 @@ def run():
     # Round
     df_plot['ratio_round'] = round(df_plot['ratio'] / 0.2) * 0.2
 
-    # First normalize the data and fit the GP
+    # First normalize the data
     x0_min = df_plot[ax_0].min()
     x0_max = df_plot[ax_0].max()
     x1_min = df_plot[ax_1].min()
@@ -101,11 +81,61 @@ def run():
     ).T
     y = df_plot[ax_2].values
 
-    # Fit the model
-    model = gp.GaussianProcessRegressor(
-        alpha=alpha_quality
+    return df_plot, x, y, (x0_min, x0_range, x1_min, x1_range)
+
+
+@style
+def run(sink: Optional[Sink] = None):
+    """
+    Create a single plot comparing mobility and image quality.
+    :param sink: Where the figure is written. If None, it is saved to file.
+    :return: The fitted GaussianProcessRegressor
+    """
+    from sklearn import gaussian_process as gp
+
+    # Define some global constants
+    ax_0 = 'ratio_round'
+    ax_1 = 'anneal'
+    res = 100
+    levels = 10
+    x0_buffer = 0.1
+    x1_buffer = 0.1
+
+    # Plotting configurations
+    cmap = 'plasma_r'
+    bar_cmap = 'plasma'
+    ax_2 = 'Quality'
+    bar_label = r'Dewetting score ($S_{dewet}$)'
+    bar_bounds = ['Poor', 'Good']
+    bar_label_offset = -25
+    alpha_quality = 1e-3
+
+    # Create the matplotlib objects
+    figure: plt.Figure = plt.figure(figsize=(9, 6), dpi=400)
+
+    ax_qual: plt.Axes = plt.subplot2grid((12, 65), (2, 3), colspan=35, rowspan=8)
+    ax_qual_c: plt.Axes = plt.subplot2grid((12, 65), (2, 44), rowspan=8)
+    ax_arrows: plt.Axes = plt.subplot2grid((1, 65), (0, 45), colspan=8)
+    ax_images: plt.Axes = plt.subplot2grid((1, 65), (0, 54), colspan=10)
+
+    figure.subplots_adjust(
+        left=0.05,
+        right=0.98,
+        top=0.98,
+        bottom=0.02,
     )
-    model.fit(x, y)
+
+    # Import the data and normalize the domain
+    df_plot, x, y, (x0_min, x0_range, x1_min, x1_range) = prepare_data(ax_0, ax_1, ax_2)
+
+    # Fit the model
+    if select_model:
+        model, _ = select(x, y)
+    else:
+        model = gp.GaussianProcessRegressor(
+            alpha=alpha_quality
+        )
+        model.fit(x, y)
 
     # Sample the model
     x0 = np.linspace(0 - x0_buffer, 1 + x0_buffer, res)
@@ -133,22 +163,17 @@ def run():
     )
 
     # # Add contours
-    ax_qual.contourf(
-        x0_gs,
-        x1_gs,
-        y.reshape((res, res)),
-        levels=levels,
+    contours = surface(x0_gs, x1_gs, y.reshape((res, res)), levels=levels)
+    contours.contourf(
+        ax_qual,
+        cmap,
         alpha=0.3,
-        cmap=cmap,
         zorder=0,
     )
 
-    ax_qual.contour(
-        x0_gs,
-        x1_gs,
-        y.reshape((res, res)),
-        levels=levels,
-        cmap=cmap,
+    contours.contour(
+        ax_qual,
+        cmap,
         zorder=1,
         linewidths=2,
     )
@@ -178,16 +203,16 @@ def run():
 
         if render_images:
 
-            # Add the image
-            arr_img = mpimg.imread(f'raw_images/{4-i}.jpg')
+            # Add the image. JPEGs are read as read-only arrays, so copy the
+            # frame before brightening it in place.
+            arr_img = np.array(mpimg.imread(f'raw_images/{4-i}.jpg'))
 
             # Make image brighter
             bright_scale = 1.75
-            arr_img_scaled = arr_img/255 * bright_scale
-            arr_img_scaled = np.where(arr_img_scaled < 1, arr_img_scaled, 1)
+            brighten(arr_img, bright_scale)
 
             offset_img = OffsetImage(
-                arr_img_scaled,
+                arr_img,
                 zoom=0.025,  # Change this for the size of the images
             )
 
@@ -233,9 +258,9 @@ def run():
     ax_images.axis('off')
 
     figname = 'morphology_data'
-    figure.savefig(f'{figname}.png')
-    figure.savefig(f'{figname}.svg')
-    os.system(f'open {figname}.png')
+    (sink or FileSink()).write(figure, figname, ['png', 'svg'])
+
+    return model
 
 
 if __name__ == '__main__':
@@ -0,0 +1,225 @@
+from scipy.linalg import solve_triangular, cho_solve
+from typing import Optional, TYPE_CHECKING
+import numpy as np
+import time
+
+if TYPE_CHECKING:
+    from sklearn import gaussian_process as gp
+
+# A GP for sequential campaigns. Each new observation extends the Cholesky
+# factor of the training covariance by one row in O(n^2), instead of
+# refitting from scratch in O(n^3). Hyperparameters are held fixed between
+# (optional) periodic re-optimizations.
+
+
+class OnlineGP:
+    """
+    A zero-mean GP regressor that is updated one observation at a time. It
+    matches GaussianProcessRegressor(kernel, alpha, optimizer=None).
+    """
+    def __init__(
+            self,
+            kernel: Optional['gp.kernels.Kernel'] = None,
+            alpha: float = 1e-10,
+            refit_every: Optional[int] = None,
+    ):
+        """
+        :param kernel: The covariance kernel. If None, 1.0 * RBF(1.0) with the
+        default (tunable) hyperparameter bounds is used.
+        :param alpha: The noise added to the diagonal
+        :param refit_every: Re-optimize the kernel hyperparameters with sklearn
+        after this many appended observations since the last full fit. If
+        None, never re-optimize.
+        """
+        if kernel is None:
+            from sklearn import gaussian_process as gp
+            kernel = gp.kernels.ConstantKernel(1.0) * gp.kernels.RBF(1.0)
+        if refit_every and kernel.n_dims == 0:
+            raise ValueError('refit_every needs a kernel with tunable hyperparameters')
+        self.kernel = kernel
+        self.alpha = alpha
+        self.refit_every = refit_every
+        self.n = 0
+        self._n_appended = 0
+
+        # Storage grows by doubling, so appends don't copy every step
+        self._x = np.empty((0, 0))
+        self._y = np.empty(0)
+        self._l = np.empty((0, 0))
+        self._a = np.empty(0)
+
+    @property
+    def x(self) -> np.ndarray:
+        return self._x[:self.n]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self._y[:self.n]
+
+    @property
+    def l(self) -> np.ndarray:
+        return self._l[:self.n, :self.n]
+
+    def _reserve(self, n: int, d: int):
+        """
+        Make room for at least n observations of dimension d.
+        :param n: The required number of observations
+        :param d: The input dimension
+        :return: None
+        """
+        cap = len(self._y)
+        if n <= cap:
+            return
+        cap = max(n, 2 * cap, 16)
+        x = np.empty((cap, d))
+        y = np.empty(cap)
+        l = np.zeros((cap, cap))
+        if self.n:
+            x[:self.n] = self.x
+            y[:self.n] = self.y
+            l[:self.n, :self.n] = self.l
+        self._x, self._y, self._l = x, y, l
+
+    def _solve(self):
+        """
+        Update the weights used for the posterior mean, K^-1 y.
+        :return: None
+        """
+        self._a = cho_solve((self.l, True), self.y)
+
+    def fit(
+            self,
+            x: np.ndarray,
+            y: np.ndarray,
+    ):
+        """
+        Fit to a batch of observations in O(n^3).
+        :param x: The inputs of shape n x d
+        :param y: The targets of length n
+        :return: self
+        """
+        x = np.atleast_2d(x)
+        y = np.asarray(y, dtype=float).ravel()
+        self.n = 0
+        self._y = np.empty(0)
+        self._reserve(len(y), x.shape[1])
+        self.n = len(y)
+        self._x[:self.n] = x
+        self._y[:self.n] = y
+        k = self.kernel(x)
+        k[np.diag_indices_from(k)] += self.alpha
+        self._l[:self.n, :self.n] = np.linalg.cholesky(k)
+        self._solve()
+        self._n_appended = 0
+        return self
+
+    def append(
+            self,
+            x: np.ndarray,
+            y: float,
+    ):
+        """
+        Add one observation by extending the Cholesky factor in O(n^2).
+        :param x: The input of length d
+        :param y: The target
+        :return: self
+        """
+        x = np.asarray(x, dtype=float).reshape(1, -1)
+        if self.n == 0:
+            return self.fit(x, [y])
+
+        # New row of the factor: [L 0; l d] with L l = k and d^2 = k** - l.l
+        k = self.kernel(self.x, x)[:, 0]
+        kss = self.kernel.diag(x)[0] + self.alpha
+        l = solve_triangular(self.l, k, lower=True, check_finite=False)
+        d = np.sqrt(max(kss - l @ l, 1e-12))
+
+        # Store
+        self._reserve(self.n + 1, x.shape[1])
+        self._x[self.n] = x
+        self._y[self.n] = y
+        self._l[self.n, :self.n] = l
+        self._l[self.n, self.n] = d
+        self.n += 1
+        self._solve()
+
+        # Periodically re-optimize the hyperparameters
+        self._n_appended += 1
+        if self.refit_every and self._n_appended % self.refit_every == 0:
+            self.reoptimize()
+        return self
+
+    def reoptimize(self):
+        """
+        Re-optimize the kernel hyperparameters with sklearn and refactor.
+        :return: self
+        """
+        from sklearn import gaussian_process as gp
+        model = gp.GaussianProcessRegressor(kernel=self.kernel, alpha=self.alpha)
+        model.fit(self.x, self.y)
+        self.kernel = model.kernel_
+        return self.fit(self.x.copy(), self.y.copy())
+
+    def predict(
+            self,
+            x: np.ndarray,
+            return_std: bool = False,
+    ):
+        """
+        Predict with the current factor.
+        :param x: The inputs of shape m x d
+        :param return_std: If True, also return the posterior standard deviation
+        :return: mean, or (mean, std)
+        """
+        ks = self.kernel(x, self.x)
+        mu = ks @ self._a
+        if not return_std:
+            return mu
+        v = solve_triangular(self.l, ks.T, lower=True, check_finite=False)
+        var = self.kernel.diag(x) - np.einsum('ij,ij->j', v, v)
+        return mu, np.sqrt(np.clip(var, 0, None))
+
+
+def validate(
+        n_initial: int = 5,
+        alpha: float = 1e-3,
+):
+    """
+    Check the online GP against a batch fit on morphology_data.csv. The first
+    n_initial samples are fit in a batch and the rest are appended one by one.
+    :param n_initial: The number of samples in the initial batch
+    :param alpha: The noise level
+    :return: None
+    """
+    from sklearn import gaussian_process as gp
+    from morphology_data import prepare_data
+    _, x, y, _ = prepare_data()
+
+    # Sequential fit
+    model = OnlineGP(alpha=alpha)
+    model.fit(x[:n_initial], y[:n_initial])
+    start = time.perf_counter()
+    for xi, yi in zip(x[n_initial:], y[n_initial:]):
+        model.append(xi, yi)
+    t_online = time.perf_counter() - start
+
+    # Batch fit, refit for every sample as morphology_data.run would
+    start = time.perf_counter()
+    for n in range(n_initial + 1, len(y) + 1):
+        batch = gp.GaussianProcessRegressor(kernel=model.kernel, alpha=alpha, optimizer=None)
+        batch.fit(x[:n], y[:n])
+    t_batch = time.perf_counter() - start
+
+    # Compare on a grid
+    g = np.linspace(-0.1, 1.1, 50)
+    g0, g1 = np.meshgrid(g, g)
+    grid = np.vstack((g0.flatten(), g1.flatten())).T
+    mu, std = model.predict(grid, return_std=True)
+    mu_b, std_b = batch.predict(grid, return_std=True)
+    print(f'{len(y) - n_initial} appends: online {t_online * 1e3:.1f} ms, batch refits {t_batch * 1e3:.1f} ms')
+    print(f'max |mean difference|: {np.abs(mu - mu_b).max():.2e}')
+    print(f'max |std difference|: {np.abs(std - std_b).max():.2e}')
+
+
+if __name__ == '__main__':
+    validate()
@@ -0,0 +1,207 @@
+from matplotlib.collections import PathCollection
+from contourpy import contour_generator, LineType, FillType
+from collections import OrderedDict
+from matplotlib.path import Path
+import matplotlib.pyplot as plt
+import matplotlib as mpl
+from matplotlib import ticker
+from typing import List, Optional, Union
+import numpy as np
+import hashlib
+
+# Compute contour paths once per surface and draw them on any number of axes,
+# in any number of styles. Equivalent to repeated calls to ax.contour and
+# ax.contourf with the same data, but the marching squares run only once.
+
+# Surfaces computed so far, most recently used last
+_cache: 'OrderedDict[str, ContourSurface]' = OrderedDict()
+cache_size = 32
+
+
+def _levels(z: np.ndarray, n: int) -> np.ndarray:
+    """
+    Choose n contour levels the same way that matplotlib does.
+    :param z: The surface values
+    :param n: The target number of levels
+    :return: An array of levels
+    """
+    zmin, zmax = np.nanmin(z), np.nanmax(z)
+    lev = ticker.MaxNLocator(n + 1, min_n_ticks=1).tick_values(zmin, zmax)
+
+    # Trim excess levels the locator may have supplied
+    under = np.nonzero(lev < zmin)[0]
+    i0 = under[-1] if len(under) else 0
+    over = np.nonzero(lev > zmax)[0]
+    i1 = over[0] + 1 if len(over) else len(lev)
+    if i1 - i0 < 3:
+        i0, i1 = 0, len(lev)
+    return lev[i0:i1]
+
+
+def _join(vertices: List[np.ndarray], codes: List[np.ndarray]) -> Path:
+    """
+    Join the pieces returned by contourpy into a single path.
+    :param vertices: A list of vertex arrays
+    :param codes: A list of path code arrays
+    :return: Path
+    """
+    if not vertices:
+        return Path(np.empty((0, 2)))
+    return Path(np.concatenate(vertices), np.concatenate(codes))
+
+
+class ContourSurface:
+    """
+    The contour line and filled paths of one surface.
+    """
+    def __init__(
+            self,
+            x: np.ndarray,
+            y: np.ndarray,
+            z: np.ndarray,
+            levels: Union[int, np.ndarray] = 10,
+    ):
+        """
+        :param x: The x grid, as for ax.contour
+        :param y: The y grid, as for ax.contour
+        :param z: The surface of the same shape as the grid
+        :param levels: The number of levels, or the levels themselves
+        """
+        self.x = x
+        self.y = y
+        self.z = z
+        if isinstance(levels, (int, np.integer)):
+            self.levels = _levels(z, int(levels))
+        else:
+            self.levels = np.asarray(levels, dtype=float)
+        self.layers = 0.5 * (self.levels[:-1] + self.levels[1:])
+        self._lines: Optional[List[Path]] = None
+        self._filled: Optional[List[Path]] = None
+
+    def _generator(self):
+        return contour_generator(
+            self.x,
+            self.y,
+            self.z,
+            name=mpl.rcParams['contour.algorithm'],
+            corner_mask=mpl.rcParams['contour.corner_mask'],
+            line_type=LineType.SeparateCode,
+            fill_type=FillType.OuterCode,
+        )
+
+    @property
+    def lines(self) -> List[Path]:
+        """
+        One path per level, computed on first use.
+        """
+        if self._lines is None:
+            gen = self._generator()
+            self._lines = [_join(*gen.lines(level)) for level in self.levels]
+        return self._lines
+
+    @property
+    def filled(self) -> List[Path]:
+        """
+        One path per layer between adjacent levels, computed on first use.
+        """
+        if self._filled is None:
+            gen = self._generator()
+            self._filled = [
+                _join(*gen.filled(lower, upper))
+                for lower, upper in zip(self.levels[:-1], self.levels[1:])
+            ]
+        return self._filled
+
+    def _colors(self, values: np.ndarray, cmap) -> np.ndarray:
+        norm = mpl.colors.Normalize(self.levels.min(), self.levels.max())
+        return plt.get_cmap(cmap)(norm(values))
+
+    def _add(self, ax: plt.Axes, collection: PathCollection) -> PathCollection:
+        ax.add_collection(collection, autolim=False)
+        ax.update_datalim([
+            (np.min(self.x), np.min(self.y)),
+            (np.max(self.x), np.max(self.y)),
+        ])
+        ax.autoscale_view()
+        return collection
+
+    def contour(
+            self,
+            ax: plt.Axes,
+            cmap='viridis',
+            **kwargs,
+    ) -> PathCollection:
+        """
+        Draw the contour lines on an axes.
+        :param ax: The axes
+        :param cmap: The colormap, coloured by level
+        :param kwargs: Collection properties, e.g. linewidths, linestyles,
+        alpha, zorder
+        :return: The added collection
+        """
+        collection = PathCollection(
+            self.lines,
+            facecolors='none',
+            edgecolors=self._colors(self.levels, cmap),
+            transform=ax.transData,
+            **kwargs,
+        )
+        return self._add(ax, collection)
+
+    def contourf(
+            self,
+            ax: plt.Axes,
+            cmap='viridis',
+            **kwargs,
+    ) -> PathCollection:
+        """
+        Draw the filled contours on an axes.
+        :param ax: The axes
+        :param cmap: The colormap, coloured by the middle of each layer
+        :param kwargs: Collection properties, e.g. alpha, zorder
+        :return: The added collection
+        """
+        kwargs.setdefault('linewidths', 0)
+        collection = PathCollection(
+            self.filled,
+            facecolors=self._colors(self.layers, cmap),
+            edgecolors='none',
+            transform=ax.transData,
+            **kwargs,
+        )
+        return self._add(ax, collection)
+
+
+def _key(x: np.ndarray, y: np.ndarray, z: np.ndarray, levels) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for a in (x, y, z, np.asarray(levels, dtype=float)):
+        a = np.ascontiguousarray(a)
+        h.update(str(a.shape).encode())
+        h.update(a.tobytes())
+    return h.hexdigest()
+
+
+def surface(
+        x: np.ndarray,
+        y: np.ndarray,
+        z: np.ndarray,
+        levels: Union[int, np.ndarray] = 10,
+) -> ContourSurface:
+    """
+    Get the ContourSurface for some data, reusing a cached one if the same data
+    has been contoured before.
+    :param x: The x grid
+    :param y: The y grid
+    :param z: The surface
+    :param levels: The number of levels, or the levels themselves
+    :return: ContourSurface
+    """
+    key = _key(x, y, z, levels)
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+    s = ContourSurface(x, y, z, levels)
+    _cache[key] = s
+    while len(_cache) > cache_size:
+        _cache.popitem(last=False)
+    return s
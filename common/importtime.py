@@ -0,0 +1,116 @@
+from typing import Dict, List, Optional, Tuple
+import subprocess
+import argparse
+import sys
+import os
+
+# The cold-start cost of importing each module, from python -X importtime.
+# Compute modules are kept free of the plotting and ML libraries, so that
+# analysis code and worker processes start quickly; the budgets below record
+# how long each module may take to import and what it must not pull in.
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Module path -> (budget in ms, modules it must not import)
+budgets: Dict[str, Tuple[float, List[str]]] = {
+    'ordered_pareto_front/pareto.py': (200, ['matplotlib', 'pandas', 'tqdm', 'scipy']),
+    'steel/elements.py': (200, ['matplotlib', 'pandas', 'scipy']),
+    'steel/colors.py': (200, ['matplotlib', 'pandas']),
+    'steel/composition.py': (400, ['matplotlib', 'pandas']),
+    'steel/catalogue.py': (800, ['matplotlib']),
+    'steel/analysis.py': (800, ['matplotlib']),
+    'world_energy/dataset.py': (800, ['matplotlib', 'sklearn']),
+    'world_energy/forecast.py': (800, ['matplotlib', 'sklearn']),
+    'world_energy/scenarios.py': (800, ['matplotlib', 'sklearn']),
+    'world_energy/ingest.py': (800, ['matplotlib', 'sklearn']),
+    '3_morphology_data/online_gp.py': (400, ['matplotlib', 'pandas', 'sklearn']),
+    'surface/acquisition.py': (400, ['matplotlib', 'pandas', 'sklearn']),
+    'surface/generate.py': (200, ['matplotlib', 'pandas', 'sklearn', 'scipy']),
+    'common/output.py': (50, ['matplotlib']),
+}
+
+
+def measure(path: str) -> Dict[str, float]:
+    """
+    Import a module in a fresh interpreter and time every import it makes.
+    :param path: The module file, relative to the root of the repository
+    :return: Module name -> cumulative import time in ms, for every module
+    imported, including the module itself
+    """
+    directory, filename = os.path.split(os.path.join(root, path))
+    module = os.path.splitext(filename)[0]
+    code = f'import sys; sys.path.insert(0, {directory!r}); import {module}'
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=directory,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # Lines are 'import time: <self us> | <cumulative us> | <indent><name>'
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if not fields[0].strip().isdigit():
+            continue
+        times[fields[2].strip()] = int(fields[1]) / 1000
+    return times
+
+
+def check(
+        paths: Optional[List[str]] = None,
+        repeat: int = 3,
+        n_top: int = 3,
+) -> List[dict]:
+    """
+    Measure each module against its budget. The fastest of several runs is
+    kept, so that the first run can write the bytecode cache.
+    :param paths: Module paths. If None, every module in budgets.
+    :param repeat: The number of runs per module
+    :param n_top: The number of slowest top-level packages to report
+    :return: One dict per module, with keys path, ms, budget, forbidden (the
+    forbidden modules imported), top ((package, ms) pairs) and ok
+    """
+    results = []
+    for path in paths or list(budgets):
+        budget, forbidden = budgets[path]
+        runs = [measure(path) for _ in range(repeat)]
+        module = os.path.splitext(os.path.basename(path))[0]
+        times = min(runs, key=lambda t: t[module])
+        packages = {}
+        for name, ms in times.items():
+            top = name.split('.')[0]
+            if top != module:
+                packages[top] = max(packages.get(top, 0), ms)
+        imported = [f for f in forbidden if f in packages]
+        results.append({
+            'path': path,
+            'ms': times[module],
+            'budget': budget,
+            'forbidden': imported,
+            'top': sorted(packages.items(), key=lambda p: -p[1])[:n_top],
+            'ok': times[module] <= budget and not imported,
+        })
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check the import time of each module against its budget.')
+    parser.add_argument('paths', nargs='*', help=f'any of {", ".join(budgets)} (default: all)')
+    parser.add_argument('-r', '--repeat', type=int, default=3)
+    args = parser.parse_args()
+    for p in args.paths:
+        if p not in budgets:
+            parser.error(f'no budget for {p}')
+
+    results = check(args.paths or None, args.repeat)
+    for r in results:
+        top = ', '.join(f'{name} {ms:.0f}' for name, ms in r['top'])
+        status = 'ok' if r['ok'] else 'FAIL'
+        print(f'{r["path"]:>34}: {r["ms"]:7.1f} / {r["budget"]:5.0f} ms  {status:<4}  {top}')
+        if r['forbidden']:
+            print(f'{"":>34}  imports {", ".join(r["forbidden"])}')
+    sys.exit(0 if all(r['ok'] for r in results) else 1)
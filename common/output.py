@@ -0,0 +1,155 @@
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+from abc import ABC, abstractmethod
+import io
+import os
+
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
+
+# Where finished figures go. Figure functions hand their figure to a sink
+# instead of saving, opening or showing it themselves, so the same code runs
+# interactively, in batch on headless servers, and behind an image service.
+
+
+class Sink(ABC):
+    """
+    Receives finished figures. Subclasses implement _write for one format.
+    """
+    def __init__(
+            self,
+            formats: Optional[List[str]] = None,
+            dpi: Optional[float] = None,
+    ):
+        """
+        :param formats: Override the formats that each figure asks for
+        :param dpi: Override the resolution of each figure
+        """
+        self.formats = formats
+        self.dpi = dpi
+
+    def _savefig_kwargs(self, fmt: str) -> dict:
+        return {
+            'format': fmt,
+            'dpi': 'figure' if self.dpi is None else self.dpi,
+        }
+
+    @abstractmethod
+    def _write(self, figure: 'plt.Figure', name: str, fmt: str) -> str:
+        """
+        Write a figure in one format.
+        :param figure: The figure
+        :param name: The figure name, without extension
+        :param fmt: The format
+        :return: The key of the output written
+        """
+
+    def write(
+            self,
+            figure: 'plt.Figure',
+            name: str,
+            formats: List[str],
+    ) -> List[str]:
+        """
+        Write a figure once per format.
+        :param figure: The figure
+        :param name: The figure name, without extension
+        :param formats: The formats the figure is normally saved in
+        :return: The keys of the outputs written, e.g. file paths
+        """
+        return [self._write(figure, name, fmt) for fmt in (self.formats or formats)]
+
+
+class FileSink(Sink):
+    """
+    Save figures as <directory>/<name>.<fmt>.
+    """
+    def __init__(
+            self,
+            directory: str = '.',
+            formats: Optional[List[str]] = None,
+            dpi: Optional[float] = None,
+    ):
+        """
+        :param directory: The output directory
+        :param formats: Override the formats that each figure asks for
+        :param dpi: Override the resolution of each figure
+        """
+        super().__init__(formats, dpi)
+        self.directory = directory
+        self.paths: List[str] = []
+
+    def _write(self, figure: 'plt.Figure', name: str, fmt: str) -> str:
+        path = os.path.join(self.directory, f'{name}.{fmt}')
+        figure.savefig(path, **self._savefig_kwargs(fmt))
+        self.paths.append(path)
+        return path
+
+
+class BytesSink(Sink):
+    """
+    Keep rendered figures in memory, keyed by (name, format).
+    """
+    def __init__(
+            self,
+            formats: Optional[List[str]] = None,
+            dpi: Optional[float] = None,
+    ):
+        """
+        :param formats: Override the formats that each figure asks for
+        :param dpi: Override the resolution of each figure
+        """
+        super().__init__(formats, dpi)
+        self.outputs: Dict[Tuple[str, str], bytes] = {}
+
+    def _write(self, figure: 'plt.Figure', name: str, fmt: str) -> str:
+        buf = io.BytesIO()
+        figure.savefig(buf, **self._savefig_kwargs(fmt))
+        self.outputs[(name, fmt)] = buf.getvalue()
+        return f'{name}.{fmt}'
+
+    def get(self, name: str, fmt: str) -> bytes:
+        """
+        :param name: The figure name
+        :param fmt: The format
+        :return: The rendered figure
+        """
+        return self.outputs[(name, fmt)]
+
+
+class NullSink(Sink):
+    """
+    Discard figures without rendering them.
+    """
+    def write(
+            self,
+            figure: 'plt.Figure',
+            name: str,
+            formats: List[str],
+    ) -> List[str]:
+        return []
+
+    def _write(self, figure: 'plt.Figure', name: str, fmt: str) -> str:
+        return f'{name}.{fmt}'
+
+
+def render(
+        function,
+        fmt: str = 'png',
+        dpi: Optional[float] = None,
+        **kwargs,
+) -> bytes:
+    """
+    Render a figure function in memory. The function must accept a sink
+    keyword, write exactly one figure to it and return that figure.
+    :param function: The figure function
+    :param fmt: The format
+    :param dpi: The resolution. If None, the figure's own dpi is used.
+    :param kwargs: Passed to the figure function
+    :return: The rendered figure
+    """
+    import matplotlib.pyplot as plt
+    sink = BytesSink(formats=[fmt], dpi=dpi)
+    figure = function(sink=sink, **kwargs)
+    plt.close(figure)
+    (output,) = sink.outputs.values()
+    return output
@@ -0,0 +1,275 @@
+from typing import Callable, Dict, List, Optional, Tuple, TYPE_CHECKING
+from datetime import datetime, timezone
+import importlib
+import inspect
+import argparse
+import time
+import json
+import io
+import os
+
+from common.scripts import root, load
+from common.output import Sink
+
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
+
+# Where the time goes when a figure function runs. The function is called with
+# a ProfileSink, and while it runs the data loaders and model fits below are
+# timed in place. The report splits the wall time into data loading, model
+# fitting, artist creation (the rest of the function up to the first write), a
+# full draw of the figure with the time spent in each artist type, and one
+# savefig per format.
+#
+#   python common/scripts.py common/profiler.py world_energy/world_energy_proc.py:consumption -o profile.jsonl
+
+# Phase -> functions timed in that phase, as 'module:attribute'. Modules that
+# can't be imported are skipped. Functions are replaced on their module or
+# class, so only calls that look them up there (e.g. pd.read_csv) are timed.
+phases: Dict[str, List[str]] = {
+    'load': [
+        'pandas:read_csv',
+        'pandas:read_excel',
+        'numpy:load',
+        'numpy:loadtxt',
+        'matplotlib.image:imread',
+    ],
+    'fit': [
+        'sklearn.gaussian_process:GaussianProcessRegressor.fit',
+        'sklearn.gaussian_process:GaussianProcessRegressor.predict',
+        'forecast:project',
+        'scenarios:simulate',
+    ],
+}
+
+
+class _PhaseTimer:
+    """
+    Replace the functions of each phase with timed wrappers while in use.
+    Calls made inside another timed call are counted in the outer one only.
+    """
+    def __init__(self, targets: Dict[str, List[str]]):
+        """
+        :param targets: Phase -> 'module:attribute' functions
+        """
+        self.targets = targets
+        self.times = {phase: 0.0 for phase in targets}
+        self._depth = 0
+        self._restore: List[Tuple[object, str, Optional[object]]] = []
+
+    def _wrap(self, phase: str, function: Callable) -> Callable:
+        def timed(*args, **kwargs):
+            self._depth += 1
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    self.times[phase] += time.perf_counter() - start
+        return timed
+
+    def __enter__(self):
+        for phase, targets in self.targets.items():
+            for target in targets:
+                module_name, attribute = target.split(':')
+                try:
+                    owner = importlib.import_module(module_name)
+                except ImportError:
+                    continue
+                *path, name = attribute.split('.')
+                for part in path:
+                    owner = getattr(owner, part)
+                # Attributes inherited by a class are deleted afterwards
+                # rather than copied onto it
+                own = owner.__dict__.get(name) if isinstance(owner, type) else getattr(owner, name)
+                self._restore.append((owner, name, own))
+                setattr(owner, name, self._wrap(phase, getattr(owner, name)))
+        return self
+
+    def __exit__(self, *exc):
+        for owner, name, original in reversed(self._restore):
+            if original is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+        self._restore = []
+
+
+def draw_times(figure: 'plt.Figure') -> Tuple[float, Dict[str, Dict[str, float]]]:
+    """
+    Draw a figure on its canvas, timing each artist. The time of an artist
+    excludes the artists it draws, so the times add up to the draw. Artists
+    created during the draw, such as ticks, count towards their parent.
+    :param figure: The figure
+    :return: (draw s, artist type -> {'n': draws, 's': time})
+    """
+    times: Dict[str, Dict[str, float]] = {}
+    children = [0.0]
+
+    def wrap(artist):
+        draw = artist.draw
+        kind = type(artist).__name__
+
+        def timed(renderer, *args, **kwargs):
+            children.append(0.0)
+            start = time.perf_counter()
+            try:
+                return draw(renderer, *args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                inner = children.pop()
+                children[-1] += elapsed
+                entry = times.setdefault(kind, {'n': 0, 's': 0.0})
+                entry['n'] += 1
+                entry['s'] += elapsed - inner
+        artist.draw = timed
+
+    artists = figure.findobj()
+    for artist in artists:
+        wrap(artist)
+    try:
+        start = time.perf_counter()
+        figure.canvas.draw()
+        elapsed = time.perf_counter() - start
+    finally:
+        for artist in artists:
+            del artist.draw
+    return elapsed, dict(sorted(times.items(), key=lambda t: -t[1]['s']))
+
+
+class ProfileSink(Sink):
+    """
+    Time the draw and each savefig of the figures written to it. The output
+    is kept in memory only to measure its size.
+    """
+    def __init__(
+            self,
+            formats: Optional[List[str]] = None,
+            dpi: Optional[float] = None,
+    ):
+        """
+        :param formats: Override the formats that each figure asks for
+        :param dpi: Override the resolution of each figure
+        """
+        super().__init__(formats, dpi)
+        self.first_write: Optional[float] = None
+        self.figures: List['plt.Figure'] = []
+        self.reports: List[dict] = []
+
+    def write(
+            self,
+            figure: 'plt.Figure',
+            name: str,
+            formats: List[str],
+    ) -> List[str]:
+        if self.first_write is None:
+            self.first_write = time.perf_counter()
+        draw, artists = draw_times(figure)
+        self._savefig = {}
+        keys = super().write(figure, name, formats)
+        self.figures.append(figure)
+        self.reports.append({
+            'name': name,
+            'draw s': draw,
+            'savefig': self._savefig,
+            'artists': artists,
+        })
+        return keys
+
+    def _write(self, figure: 'plt.Figure', name: str, fmt: str) -> str:
+        buf = io.BytesIO()
+        start = time.perf_counter()
+        figure.savefig(buf, **self._savefig_kwargs(fmt))
+        self._savefig[fmt] = {'s': time.perf_counter() - start, 'MB': buf.tell() / 1e6}
+        return f'{name}.{fmt}'
+
+
+def profile(
+        function: Callable,
+        formats: Optional[List[str]] = None,
+        dpi: Optional[float] = None,
+        targets: Optional[Dict[str, List[str]]] = None,
+        **kwargs,
+) -> dict:
+    """
+    Profile a figure function. The function must accept a sink keyword and
+    write its figure to it.
+    :param function: The figure function
+    :param formats: Override the formats that the figure asks for
+    :param dpi: Override the resolution of the figure
+    :param targets: Phase -> functions to time. If None, phases.
+    :param kwargs: Passed to the figure function
+    :return: The report, with keys function, time, total s, load s, fit s,
+    artists s, and name, draw s, savefig (format -> {'s', 'MB'}) and artists
+    (artist type -> {'n', 's'}) of the first figure written
+    """
+    import matplotlib
+    import matplotlib.pyplot as plt
+    sink = ProfileSink(formats, dpi)
+    timer = _PhaseTimer(phases if targets is None else targets)
+    with timer:
+        start = time.perf_counter()
+        function(sink=sink, **kwargs)
+        end = time.perf_counter()
+    for figure in sink.figures:
+        plt.close(figure)
+    if not sink.reports:
+        raise ValueError(f'{function.__name__} did not write a figure')
+
+    # Everything up to the first write that isn't loading or fitting is
+    # spent creating artists
+    built = sink.first_write - start
+
+    # Figure functions decorated with a Style are reported by their own file,
+    # not the file of the wrapper
+    report = {
+        'function': f'{os.path.relpath(inspect.getsourcefile(inspect.unwrap(function)), root)}:{function.__name__}',
+        'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'matplotlib': matplotlib.__version__,
+        'total s': end - start,
+        **{f'{phase} s': t for phase, t in timer.times.items()},
+        'artists s': built - sum(timer.times.values()),
+    }
+    report.update(sink.reports[0])
+    return report
+
+
+def _print(report: dict, n_top: int = 8):
+    """
+    Print a report as a table.
+    """
+    print(f'{report["function"]} ({report["name"]})')
+    rows = [(key[:-2], report[key]) for key in report if key.endswith(' s') and key != 'total s']
+    rows += [(f'savefig {fmt}', r['s']) for fmt, r in report['savefig'].items()]
+    rows.append(('total', report['total s']))
+    for label, t in rows:
+        print(f'{label:>24}: {t:7.3f} s')
+    print(f'{"draw by artist":>24}')
+    for kind, r in list(report['artists'].items())[:n_top]:
+        print(f'{kind:>24}: {r["s"]:7.3f} s ({r["n"]} draws)')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Profile figure functions.')
+    parser.add_argument('functions', nargs='+', help='script.py:function, relative to the repository root')
+    parser.add_argument('--formats', nargs='+', default=None)
+    parser.add_argument('--dpi', type=float, default=None)
+    parser.add_argument('-o', '--output', default=None, help='append the reports to this JSON lines file')
+    args = parser.parse_args()
+
+    import matplotlib
+    matplotlib.use('Agg')
+    output = os.path.abspath(args.output) if args.output else None
+    for spec in args.functions:
+        path, name = spec.split(':')
+
+        # Scripts read their data relative to their own directory
+        os.chdir(os.path.dirname(os.path.join(root, path)))
+        module = load(path, '_profiled')
+
+        report = profile(getattr(module, name), args.formats, args.dpi)
+        _print(report)
+        if output:
+            with open(output, 'a') as f:
+                f.write(json.dumps(report) + '\n')
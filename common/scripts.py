@@ -0,0 +1,69 @@
+from types import ModuleType
+import importlib.util
+import argparse
+import runpy
+import sys
+import os
+
+# Running and loading the scripts of the repository. The scripts import the
+# shared modules as packages (common.output, steel.colors) and their neighbours
+# by name (from composition import Steel), so they need both the root of the
+# repository and their own directory on sys.path. This is the one place that
+# sets it up: the root goes first, so that e.g. steel/steel.py doesn't shadow
+# the steel package, and script directories are appended.
+#
+#   python common/scripts.py steel/steel.py
+#   python common/scripts.py common/server.py --port 8000
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def add_path(path: str) -> str:
+    """
+    Put the root of the repository first on sys.path and append the directory
+    of a script.
+    :param path: The script, relative to the root of the repository
+    :return: The absolute path of the script
+    """
+    full = os.path.join(root, path)
+    if sys.path[:1] != [root]:
+        if root in sys.path:
+            sys.path.remove(root)
+        sys.path.insert(0, root)
+    directory = os.path.dirname(full)
+    if directory not in sys.path:
+        sys.path.append(directory)
+    return full
+
+
+def load(
+        path: str,
+        prefix: str = '_script',
+) -> ModuleType:
+    """
+    Import a script under a private module name, so that it can be loaded
+    next to modules of the same name (steel/steel.py and the steel package).
+    Each call executes the script again.
+    :param path: The script, relative to the root of the repository
+    :param prefix: The prefix of the module name
+    :return: The module
+    """
+    full = add_path(path)
+    name = f'{prefix}_{os.path.splitext(os.path.relpath(full, root))[0].replace(os.sep, "_")}'
+    spec = importlib.util.spec_from_file_location(name, full)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run a script of the repository. Further arguments are passed to it.')
+    parser.add_argument('script', help='the script, relative to the working directory')
+    args = parser.parse_args(sys.argv[1:2])
+
+    # Python put the directory of this file first on the path. The shared
+    # modules are imported as common.<module>, never by name, so it goes.
+    del sys.path[0]
+    script = add_path(os.path.abspath(args.script))
+    sys.argv = [script, *sys.argv[2:]]
+    runpy.run_path(script, run_name='__main__')
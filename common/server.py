@@ -0,0 +1,290 @@
+from wsgiref.simple_server import make_server
+from urllib.parse import parse_qs
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+import threading
+import hashlib
+import json
+import sys
+import os
+
+from common.scripts import root, load
+
+# A small WSGI service that renders figures on demand, for the public site.
+#
+#   GET /                          list the figures
+#   GET /<figure>.<fmt>?dpi=<dpi>  the rendered figure
+#
+# Responses are kept in an LRU cache keyed by figure, format, dpi and a hash
+# of the data and code that the figure is drawn from, so a figure is only
+# re-rendered when something it depends on changes. When its code changes, its
+# modules are imported again before it is rendered.
+#
+#   python common/scripts.py common/server.py --port 8000
+
+content_types = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+    'pdf': 'application/pdf',
+    'jpg': 'image/jpeg',
+}
+
+# Loaded figure modules, by path
+_modules = {}
+
+# Script path -> hash of the code of the figure it was last rendered with
+_code_hashes: Dict[str, str] = {}
+
+
+def _load(path: str):
+    """
+    Import a figure script once.
+    :param path: The script path, relative to the repository root
+    :return: The module
+    """
+    if path not in _modules:
+        _modules[path] = load(path, '_served')
+    return _modules[path]
+
+
+def _world_energy(name: str) -> Callable[[str, Optional[float]], bytes]:
+    directory = os.path.join(root, 'world_energy')
+    kwargs = {}
+    if name == 'fossil_nonfossil':
+        kwargs['predict_path'] = os.path.join(directory, 'prediction.csv')
+
+    def render(fmt, dpi):
+        module = _load('world_energy/world_energy_proc.py')
+        return module.render(name, fmt, dpi, path=os.path.join(directory, 'data.csv'), **kwargs)
+    return render
+
+
+def _ordered_apareto_front(fmt, dpi):
+    module = _load('ordered_pareto_front/ordered_apareto_front.py')
+    return module.render(fmt, dpi, directory=os.path.join(root, 'ordered_pareto_front', 'data'))
+
+
+def _steel(fmt, dpi):
+    return _load('steel/steel.py').render(fmt, dpi)
+
+
+# Figure name -> (render(fmt, dpi), files and directories it depends on)
+_world_energy_files = [
+    'world_energy/data.csv',
+    'world_energy/prediction.csv',
+    'world_energy/world_energy_proc.py',
+    'world_energy/dataset.py',
+    'world_energy/forecast.py',
+    'world_energy/scenarios.py',
+    'world_energy/stacked.py',
+    'world_energy/ingest.py',
+    'common/output.py',
+    'common/style.py',
+]
+figures: Dict[str, Tuple[Callable[[str, Optional[float]], bytes], List[str]]] = {
+    **{
+        name: (_world_energy(name), _world_energy_files)
+        for name in [
+            'proportion',
+            'abs_difference',
+            'consumption',
+            'change',
+            'consumption_projected',
+            'fossil_nonfossil',
+        ]
+    },
+    'ordered_apareto_front': (_ordered_apareto_front, [
+        'ordered_pareto_front/data',
+        'ordered_pareto_front/ordered_apareto_front.py',
+        'ordered_pareto_front/pareto.py',
+        'steel/colors.py',
+        'common/output.py',
+        'common/style.py',
+    ]),
+    'steel': (_steel, [
+        'steel/steel.py',
+        'steel/composition.py',
+        'steel/elements.py',
+        'steel/colors.py',
+        'common/output.py',
+        'common/style.py',
+    ]),
+}
+
+# File hashes: path -> ((mtime, size), digest)
+_file_hashes: Dict[str, Tuple[Tuple[float, int], bytes]] = {}
+
+
+def _file_hash(path: str) -> bytes:
+    """
+    Hash a file's contents, reusing the previous hash while its mtime and size
+    are unchanged.
+    :param path: The file
+    :return: The digest
+    """
+    st = os.stat(path)
+    stamp = (st.st_mtime, st.st_size)
+    cached = _file_hashes.get(path)
+    if cached is None or cached[0] != stamp:
+        with open(path, 'rb') as f:
+            cached = (stamp, hashlib.blake2b(f.read(), digest_size=16).digest())
+        _file_hashes[path] = cached
+    return cached[1]
+
+
+def data_hash(paths: List[str]) -> str:
+    """
+    Hash a set of files and directories (recursively). Missing paths are
+    hashed as missing.
+    :param paths: Paths relative to the repository root
+    :return: A hex digest
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        full = os.path.join(root, path)
+        if os.path.isdir(full):
+            files = sorted(
+                os.path.join(d, f)
+                for d, _, fs in os.walk(full)
+                for f in fs
+            )
+        else:
+            files = [full]
+        for f in files:
+            h.update(f.encode())
+            h.update(_file_hash(f) if os.path.exists(f) else b'missing')
+    return h.hexdigest()
+
+
+def _refresh(paths: List[str]) -> str:
+    """
+    Forget the modules of a figure if its code has changed since one of its
+    scripts was last loaded, so that the next render imports the new code.
+    Every module of the figure is forgotten, not only the files that changed,
+    since the others hold references into them.
+    :param paths: The files and directories the figure depends on
+    :return: The hash of the figure's code, to record with _loaded
+    """
+    sources = [p for p in paths if p.endswith('.py')]
+    code = data_hash(sources)
+    if any(_code_hashes.get(p, code) != code for p in sources if p in _modules):
+        files = {os.path.join(root, p) for p in sources}
+        for p in sources:
+            _modules.pop(p, None)
+        for key, module in list(sys.modules.items()):
+            if getattr(module, '__file__', None) in files:
+                del sys.modules[key]
+    return code
+
+
+def _loaded(paths: List[str], code: str):
+    """
+    Record the code that the loaded scripts of a figure were rendered with.
+    :param paths: The files and directories the figure depends on
+    :param code: The hash from _refresh
+    :return: None
+    """
+    for p in paths:
+        if p in _modules:
+            _code_hashes[p] = code
+
+
+class FigureServer:
+    """
+    WSGI application serving rendered figures from an LRU cache.
+    """
+    def __init__(
+            self,
+            cache_size: int = 128,
+    ):
+        """
+        :param cache_size: The maximum number of cached responses
+        """
+        self.cache_size = cache_size
+        self.cache: 'OrderedDict[tuple, bytes]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        # pyplot is not thread safe
+        self._lock = threading.Lock()
+
+    def get(
+            self,
+            name: str,
+            fmt: str = 'png',
+            dpi: Optional[float] = None,
+    ) -> Tuple[bytes, bool]:
+        """
+        Get a rendered figure, rendering it if it isn't cached.
+        :param name: The figure name
+        :param fmt: The format
+        :param dpi: The resolution. If None, the figure's own dpi is used.
+        :return: (rendered figure, whether it came from the cache)
+        """
+        render, paths = figures[name]
+        key = (name, fmt, dpi, data_hash(paths))
+        with self._lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return self.cache[key], True
+            code = _refresh(paths)
+            body = render(fmt, dpi)
+            _loaded(paths, code)
+            self.misses += 1
+            self.cache[key] = body
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+            return body, False
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '/').strip('/')
+
+        # Index
+        if not path:
+            body = json.dumps({
+                'figures': list(figures),
+                'formats': list(content_types),
+                'cache': {'size': len(self.cache), 'hits': self.hits, 'misses': self.misses},
+            }).encode()
+            start_response('200 OK', [('Content-Type', 'application/json')])
+            return [body]
+
+        # Parse /<figure>.<fmt>?dpi=<dpi>
+        name, _, fmt = path.rpartition('.')
+        if name not in figures:
+            start_response('404 Not Found', [('Content-Type', 'text/plain')])
+            return [f'Unknown figure: {path}'.encode()]
+        if fmt not in content_types:
+            start_response('400 Bad Request', [('Content-Type', 'text/plain')])
+            return [f'Unsupported format: {fmt}'.encode()]
+        query = parse_qs(environ.get('QUERY_STRING', ''))
+        try:
+            dpi = float(query['dpi'][0]) if 'dpi' in query else None
+        except ValueError:
+            dpi = -1
+        if dpi is not None and not 10 <= dpi <= 1200:
+            start_response('400 Bad Request', [('Content-Type', 'text/plain')])
+            return [b'dpi must be between 10 and 1200']
+
+        body, hit = self.get(name, fmt, dpi)
+        start_response('200 OK', [
+            ('Content-Type', content_types[fmt]),
+            ('Content-Length', str(len(body))),
+            ('X-Cache', 'hit' if hit else 'miss'),
+        ])
+        return [body]
+
+
+if __name__ == '__main__':
+    import argparse
+    import matplotlib as mpl
+    mpl.use('Agg')
+    parser = argparse.ArgumentParser(description='Serve rendered figures.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--cache-size', type=int, default=128)
+    args = parser.parse_args()
+    with make_server(args.host, args.port, FigureServer(args.cache_size)) as server:
+        print(f'Serving figures on http://{args.host}:{args.port}/')
+        server.serve_forever()
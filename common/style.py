@@ -0,0 +1,135 @@
+from typing import Callable, Dict, Iterable, List, Optional, Union, TYPE_CHECKING
+from functools import cached_property, lru_cache, wraps
+from matplotlib import font_manager
+import matplotlib as mpl
+import numpy as np
+
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
+
+# Shared figure styles. A Style is a set of rcParams that is applied around a
+# figure function with rc_context, instead of mutating the global rcParams at
+# import. Font families are resolved against the installed fonts once per
+# process: families that are missing (e.g. Roboto or Arial on a Linux node)
+# are replaced by the fallback up front, rather than going through the font
+# manager's fallback search and warnings on every render.
+
+fallback = 'DejaVu Sans'
+
+# The rcParams that hold font families
+font_keys = (
+    'font.family',
+    'font.serif',
+    'font.sans-serif',
+    'font.cursive',
+    'font.fantasy',
+    'font.monospace',
+)
+
+# Family names that matplotlib resolves through the rcParams above
+generic_families = {'serif', 'sans', 'sans serif', 'sans-serif', 'cursive', 'fantasy', 'monospace'}
+
+
+@lru_cache(maxsize=None)
+def _installed() -> Dict[str, str]:
+    """
+    :return: Lowercase family name -> family name, for every installed font
+    """
+    return {f.name.lower(): f.name for f in font_manager.fontManager.ttflist}
+
+
+@lru_cache(maxsize=None)
+def resolve_font(family: str) -> Optional[str]:
+    """
+    Find an installed font family. Matching is case-insensitive, as in the
+    font manager.
+    :param family: The family, e.g. 'Roboto', or a generic family
+    :return: The installed family name, the generic family, or None if the
+    family is not installed
+    """
+    if family.lower() in generic_families:
+        return family
+    return _installed().get(family.lower())
+
+
+def resolve_fonts(families: Union[str, Iterable[str]]) -> List[str]:
+    """
+    :param families: A family or a list of families, in order of preference
+    :return: The installed families, or [fallback] if there are none
+    """
+    families = [families] if isinstance(families, str) else families
+    resolved = [f for f in map(resolve_font, families) if f is not None]
+    return resolved or [fallback]
+
+
+class Style:
+    """
+    A set of rcParams. Use it as a context manager through context(), or as
+    a decorator on a figure function:
+
+        @style
+        def figure(sink=None): ...
+    """
+    def __init__(self, rc: Dict[str, object]):
+        """
+        :param rc: The rcParams, as they would be given to mpl.rc_context
+        """
+        self._rc = rc
+
+    @cached_property
+    def rc(self) -> Dict[str, object]:
+        """
+        The rcParams with font families resolved and every value validated,
+        computed on first use.
+        """
+        rc = dict(self._rc)
+        for key in font_keys:
+            if key in rc:
+                rc[key] = resolve_fonts(rc[key])
+        return dict(mpl.RcParams(rc))
+
+    def context(self):
+        """
+        :return: A context manager that applies the style
+        """
+        return mpl.rc_context(self.rc)
+
+    def __call__(self, function: Callable) -> Callable:
+        """
+        Apply the style for the duration of each call of a figure function.
+        The function should write its figure before it returns, since text is
+        laid out with the fonts in effect when the figure is drawn.
+        :param function: The figure function
+        :return: The wrapped function
+        """
+        @wraps(function)
+        def styled(*args, **kwargs):
+            with self.context():
+                return function(*args, **kwargs)
+        return styled
+
+
+def format_axes(
+        axes: Union['plt.Axes', Iterable['plt.Axes']],
+        spines: Iterable[str] = ('left', 'right', 'top', 'bottom'),
+        ticks: bool = True,
+        **tick_params,
+):
+    """
+    Hide spines and ticks of one or more axes at once.
+    :param axes: An axes, or any (nested) collection of axes
+    :param spines: The spines to hide
+    :param ticks: If False, remove the ticks and tick labels
+    :param tick_params: Passed to tick_params for the major and minor ticks of
+    both axes, e.g. length=10, color='white'
+    :return: None
+    """
+    spines = list(spines)
+    for ax in np.ravel(np.array(axes, dtype=object)):
+        for pos in spines:
+            ax.spines[pos].set_visible(False)
+        if not ticks:
+            ax.set_xticks([])
+            ax.set_yticks([])
+        if tick_params:
+            ax.tick_params(axis='both', which='both', **tick_params)
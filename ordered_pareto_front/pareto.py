@@ -0,0 +1,199 @@
+from typing import Optional, Iterator
+import numpy as np
+import operator
+
+# Pareto front and hypervolume calculations. Kept apart from the plotting so
+# that workers and analyses can import them without matplotlib or pandas.
+
+
+def convert_to_conductivity(xrf_conductivity):
+    """
+    Convert from condxrf to conductivity
+    :param xrf_conductivity: Units S / cps
+    :return: S / m
+    """
+
+    # Define the slope that converts between cps and nm
+    slope = 1.59605107323  # units of cps / nm
+
+    # xrf_conductivity has units of S / cps. Convert to S / nm
+    conductivity_nm = xrf_conductivity / slope
+
+    # Convert into conductivity_nm using the thin film formula
+    conductivity_nm = conductivity_nm * np.log(2) / np.pi
+
+    # Convert from units of S / nm to S / m
+    conductivity_m = conductivity_nm * 1E9
+
+    return conductivity_m
+
+
+def pareto_bool(
+        y: np.ndarray,
+        strict: bool = False,
+        omax: Optional[Iterator[bool]] = None
+) -> np.ndarray:
+    """
+    Generate the Pareto front mask for an array
+    :param y: The input of shape n_samples x m_dimensionality
+    :param strict: will not include points that are in between points on the Pareto front
+    :param omax: An iterator of bools determining which objectives should be maximized. If
+    None, all will be maximized.
+    :return:
+    """
+
+    # Flip signs if needed
+    y = np.copy(y)
+    omax = np.full(y.shape[1], True) if omax is None else omax
+    mask = ~np.array([omax, ] * len(y))
+    y[mask] = -y[mask]
+
+    # Calculate Pareto bool
+    comp = operator.le if strict else operator.lt
+    return ~np.array([np.any(np.prod(comp(y[i], np.delete(y, i, axis=0)), axis=1, dtype=bool)) for i in range(len(y))])
+
+
+def calc_hypervolume(
+        y: np.ndarray,
+):
+    """
+    Calculates the hypervolume of an array. Note that this only works for 2D
+    arrays. The array must be scaled such that the reference point is 0. This
+    function should only be passed the Pareto array, not all the
+    observations
+    :param y: An array of shape samples x dimensions
+    :return: float
+    """
+
+    # Make a copy of the array
+    yc = np.copy(y)
+
+    # Sort the data to be first ascending in x (col 0), and then descending in
+    # y (col 1). First, make col 1 neg, sort by col 1 ascending, sort by col 1
+    # ascending, and then make col 1 pos.
+    # tstart = time.time()
+    yc[:, 1] *= -1
+    yc = yc[np.lexsort((yc[:, 1], yc[:, 0]))]
+    yc[:, 1] *= -1
+
+    # Determine the lower reference point for each rectangle integration
+    yl = np.concatenate(([[0, 0]], yc[:-1]))
+    yl[:, 1] = 0
+
+    # Sum areas
+    a = np.sum(np.prod(yc - yl, axis=1))
+
+    return a
+
+
+def pareto_bool_iter(
+        y: np.ndarray,
+        strict: bool = False,
+        omax: Optional[Iterator[bool]] = None,
+) -> np.ndarray:
+    """
+    Iteratively assess the Pareto front for an array
+    :param y: The input of shape n_samples x m_dimensionality
+    :param strict: will not include points that are in between points on the
+    Pareto front
+    :param omax: An iterator of bools determining which objectives should be
+    maximized. If None, all will be maximized.
+    :return: An array of length n_samples. Each integer in the array indicates
+    when that observation last had Pareto dominance. For example array[2] = 3
+    means that the second observation last had dominance at the third iteration.
+    np.nan means the observation never had Pareto dominance.
+    """
+
+    # Get the length of the array
+    length = y.shape[0]
+
+    # Create a place to store the values
+    pbool_idx = np.repeat(np.nan, length).astype('object')
+
+    # Initiate the first point, which must be a Pareto point
+    pbool_idx[0] = 0
+
+    # Create the iterative dataset, and indexes for this data
+    pdata = y[0][None, :]
+    pidx = np.array([0])
+
+    # Create an array that can be used to flip omax polarity
+    if omax is None:
+        pol = np.array([1] * y.shape[1])
+    else:
+        pol = np.array(omax).astype(int) * 2 - 1
+
+    # Progress bars are only needed here
+    from tqdm import tqdm
+
+    # For each remaining point
+    for i in tqdm(range(1, length)):
+
+        # Test to see if the Pareto front needs to be calculated
+        comp = operator.le if strict else operator.lt
+        if np.any(np.all(comp(y[i], pdata * pol), axis=1)):
+            # Update arrays
+            pbool_idx[pidx] = i
+
+            # Skip Pareto calculation
+            continue
+
+        # Update the pdata and pidx prior to Pareto analysis
+        pdata = np.vstack((pdata, y[i]))
+        pidx = np.append(pidx, i)
+
+        # Test Pareto
+        pbool = pareto_bool(
+            y=pdata,
+            strict=strict,
+            omax=omax,
+        )
+
+        # Update the pdata, and the pdata index based on the Pareto analysis
+        pdata = pdata[pbool]
+        pidx = pidx[pbool]
+
+        # Update the master list
+        pbool_idx[pidx] = i
+
+    return pbool_idx
+
+
+def calc_hypervolume_iter(
+        y: np.ndarray,
+        strict: bool = True,
+) -> np.ndarray:
+    """
+    Calculate the change in hypervolume. Note that this function ingests all
+    the data, not just the Pareto front. (Unlike calc_hypervolume()). Note that
+    the data must be scaled such that 0 is the reference point
+    :param y: An array of shape samples x dimensions
+    :param strict: will not include points that are in between points on the
+    Pareto front.
+    :return: An array of length samples.
+    """
+
+    # Create an array in which to store the hypervolumes
+    length = len(y)
+    result = np.repeat(np.nan, length)
+
+    # Get the Pareto bool iter. Each value indicates where that value was last
+    # Pareto dominant.
+    pbool_idx = pareto_bool_iter(
+        y=y,
+        strict=strict,
+    )
+
+    # For each observation
+    for i in range(length):
+        # Get the indices of the Pareto front
+        pbool = pbool_idx[:i + 1] >= i
+
+        # Calculate the hypervolume
+        hv = calc_hypervolume(y[:i + 1][pbool])
+
+        # Store the hypervolume
+        result[i] = hv
+
+    # Return
+    return result
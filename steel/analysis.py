@@ -0,0 +1,146 @@
+from typing import Optional
+from composition import Steels
+import scipy.sparse as sp
+import pandas as pd
+import numpy as np
+import argparse
+import time
+
+# Queries over the steel x element incidence matrix of Steels. Each query is a
+# sparse product or a bincount over the CSR arrays, so it scales with the
+# number of (steel, element) entries rather than with steels x elements.
+
+
+def _year_matrix(steels: Steels):
+    """
+    :return: (years, a sparse year x steel indicator matrix)
+    """
+    years, codes = np.unique(steels.years, return_inverse=True)
+    y = sp.csr_matrix(
+        (np.ones(len(codes), dtype=np.int32), (codes, np.arange(len(codes)))),
+        shape=(len(years), len(codes)),
+    )
+    return years, y
+
+
+def element_counts(steels: Steels) -> pd.DataFrame:
+    """
+    The number of steels introduced each year that contain each element.
+    :param steels: The steels
+    :return: DataFrame indexed by year, one column per element
+    """
+    years, y = _year_matrix(steels)
+    counts = (y @ steels.incidence.astype(np.int32)).toarray()
+    return pd.DataFrame(counts, index=pd.Index(years, name='year'), columns=steels.elements.tolist())
+
+
+def first_appearance(steels: Steels) -> pd.Series:
+    """
+    The year each element first appears in a steel.
+    :param steels: The steels
+    :return: Series indexed by element, in order of appearance
+    """
+    incidence = steels.incidence
+    rows = np.repeat(np.arange(len(steels)), np.diff(incidence.indptr))
+    first = np.full(len(steels.elements), len(steels), dtype=np.int64)
+    np.minimum.at(first, incidence.indices, rows)
+    return pd.Series(steels.years[first], index=steels.elements.tolist(), name='year')
+
+
+def cooccurrence(
+        steels: Steels,
+        normalize: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    How often each pair of elements appears in the same steel.
+    :param steels: The steels
+    :param normalize: None for counts (the diagonal is the number of steels
+    containing each element), 'jaccard' for |A and B| / |A or B|, or
+    'conditional' for P(column element | row element)
+    :return: DataFrame of elements x elements
+    """
+    b = steels.incidence.astype(np.int32)
+    counts = (b.T @ b).toarray()
+    diagonal = np.diag(counts).astype(float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if normalize is None:
+            values = counts
+        elif normalize == 'jaccard':
+            values = counts / (diagonal[:, None] + diagonal[None, :] - counts)
+        elif normalize == 'conditional':
+            values = counts / diagonal[:, None]
+        else:
+            raise ValueError(f'Unknown normalization: {normalize}')
+    names = steels.elements.tolist()
+    return pd.DataFrame(values, index=names, columns=names)
+
+
+def complexity(
+        steels: Steels,
+        window: int = 10,
+) -> pd.DataFrame:
+    """
+    Rolling statistics of the number of elements per steel.
+    :param steels: The steels
+    :param window: The window, in years. Each year covers the steels
+    introduced in it and the window - 1 years before.
+    :return: DataFrame indexed by every year from the first to the last, with
+    columns count (steels in the window), mean, std and max (elements per
+    steel), and new (elements first appearing in the window)
+    """
+    lengths = steels.lengths().astype(float)
+    start = int(steels.years.min())
+    years = np.arange(start, int(steels.years.max()) + 1)
+    codes = steels.years - start
+
+    # Window sums as differences of cumulative sums of per-year sums
+    stop = np.arange(1, len(years) + 1)
+
+    def rolling_sum(per_year: np.ndarray) -> np.ndarray:
+        total = np.concatenate(([0], np.cumsum(per_year)))
+        return total[stop] - total[np.maximum(stop - window, 0)]
+
+    n = rolling_sum(np.bincount(codes, minlength=len(years)))
+    s1 = rolling_sum(np.bincount(codes, weights=lengths, minlength=len(years)))
+    s2 = rolling_sum(np.bincount(codes, weights=lengths ** 2, minlength=len(years)))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = s1 / n
+        std = np.sqrt(np.maximum(s2 / n - mean ** 2, 0))
+
+    # The most complex steel of each year, then the rolling max
+    year_max = np.full(len(years), np.nan)
+    np.fmax.at(year_max, codes, lengths)
+    rolling_max = pd.Series(year_max).rolling(window, min_periods=1).max().to_numpy()
+
+    # Elements first appearing each year
+    first = first_appearance(steels).to_numpy() - start
+    new = rolling_sum(np.bincount(first, minlength=len(years)))
+
+    return pd.DataFrame({
+        'count': n,
+        'mean': mean,
+        'std': std,
+        'max': rolling_max,
+        'new': new,
+    }, index=pd.Index(years, name='year'))
+
+
+if __name__ == '__main__':
+    from benchmarks import _catalogue
+    from elements import to_numbers
+    parser = argparse.ArgumentParser(description='Time the steel queries on a random catalogue.')
+    parser.add_argument('-n', '--n-steels', type=int, default=100000)
+    parser.add_argument('-k', '--n-elements', type=int, default=8)
+    args = parser.parse_args()
+
+    compositions = _catalogue(args.n_steels, args.n_elements, 0)
+    steels = Steels.from_arrays(
+        np.array([f'Grade {i}' for i in range(args.n_steels)], dtype=object),
+        np.random.default_rng(0).integers(1850, 2020, args.n_steels),
+        np.arange(args.n_steels + 1) * args.n_elements,
+        to_numbers([s for comp in compositions for s in comp]),
+    )
+    for query in [element_counts, first_appearance, cooccurrence, complexity]:
+        start = time.perf_counter()
+        query(steels)
+        print(f'{query.__name__:>18}: {1000 * (time.perf_counter() - start):.1f} ms')
@@ -0,0 +1,186 @@
+from typing import Callable, Dict, List
+from elements import symbols, to_numbers
+from composition import Steel, Steels
+from steel.steel import run
+from colors import c
+import matplotlib.patches as patches
+import matplotlib.pyplot as plt
+import numpy as np
+import io
+import tracemalloc
+import argparse
+import time
+import gc
+
+# Benchmarks of the steel data structures. The legacy classes below are the
+# original representation (one Element subclass per element, a new instance
+# per use), kept only to compare against.
+
+
+class _LegacyElement:
+    def __init__(self):
+        self.name = self.__class__.__name__
+
+
+class _LegacySteel:
+    def __init__(self, elements, year, name='None'):
+        self.name = name
+        self.year = year
+        self.elements = elements
+
+
+# One subclass per element, as in the original steel.py
+_legacy_classes = {s: type(s, (_LegacyElement,), {}) for s in symbols}
+
+
+def _catalogue(n_steels: int, n_elements: int, seed: int) -> List[List[str]]:
+    """
+    Random compositions drawn from the 30 most common alloying elements.
+    """
+    rng = np.random.default_rng(seed)
+    pool = np.array(['Fe', 'C', 'Cr', 'Ni', 'Mn', 'Si', 'Mo', 'V', 'W', 'Co', 'Cu', 'Ti',
+                     'Nb', 'Al', 'B', 'N', 'P', 'S', 'Zr', 'Ta', 'Se', 'Te', 'Pb', 'Bi',
+                     'Ca', 'Ce', 'La', 'Mg', 'Sn', 'As'])
+    return [
+        pool[rng.choice(len(pool), size=n_elements, replace=False)].tolist()
+        for _ in range(n_steels)
+    ]
+
+
+def _measure(build: Callable[[], object]) -> Dict[str, float]:
+    """
+    Measure the memory still allocated by a build once it returns, and the
+    time it takes.
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {'MB': current / 1e6, 'peak MB': peak / 1e6, 's': elapsed}
+
+
+def benchmark_memory(
+        n_steels: int = 100000,
+        n_elements: int = 8,
+        seed: int = 0,
+) -> Dict[str, Dict[str, float]]:
+    """
+    Compare the memory used by a catalogue of steels in the legacy classes and
+    in the element registry.
+    :param n_steels: The number of steels
+    :param n_elements: The number of elements per steel
+    :param seed: Seed for the compositions
+    :return: Representation -> {'MB', 'peak MB', 's'}
+    """
+    compositions = _catalogue(n_steels, n_elements, seed)
+    years = np.random.default_rng(seed).integers(1850, 2020, n_steels).tolist()
+
+    def legacy():
+        return [
+            _LegacySteel([_legacy_classes[s]() for s in comp], year)
+            for comp, year in zip(compositions, years)
+        ]
+
+    def registry():
+        return [Steel(comp, year) for comp, year in zip(compositions, years)]
+
+    def indexed():
+        return Steels([Steel(comp, year) for comp, year in zip(compositions, years)])
+
+    return {
+        'legacy': _measure(legacy),
+        'registry': _measure(registry),
+        'registry + Steels': _measure(indexed),
+    }
+
+
+def _legacy_run(steels: Steels) -> plt.Figure:
+    """
+    The original drawing loop: a Circle patch per component, with the row
+    labels added again for every component.
+    """
+    figure: plt.Figure = plt.figure(figsize=(10, 5), dpi=300)
+    ax: plt.Axes = figure.add_subplot()
+    for i, e in enumerate(steels.elements):
+        ax.text(i, 0.5, e, horizontalalignment='center')
+    lengths = steels.lengths()
+    for i, (name, year) in enumerate(zip(steels.names, steels.years)):
+        y = -i
+        for x in steels.columns(i):
+            ax.add_patch(patches.Circle(
+                (x, y),
+                radius=0.175,
+                facecolor=c.pink.i400,
+                edgecolor=c.pink.i700,
+                linewidth=2,
+            ))
+            ax.text(-1.5, y, f'{name} ({year})', verticalalignment='center', horizontalalignment='right')
+            ax.text(-1, y, str(lengths[i]), verticalalignment='center')
+    ax.set_xlim(-4, len(steels.elements))
+    ax.set_ylim(-len(steels), 1)
+    ax.set_aspect('equal')
+    return figure
+
+
+def benchmark_render(
+        n_steels: int = 1000,
+        n_elements: int = 8,
+        seed: int = 0,
+) -> Dict[str, Dict[str, float]]:
+    """
+    Compare the original drawing loop with run() on a random catalogue.
+    :param n_steels: The number of steels
+    :param n_elements: The number of elements per steel
+    :param seed: Seed for the compositions
+    :return: Renderer -> {'build s', 'png s', 'svg s', 'svg MB'}
+    """
+    from common.output import NullSink
+    compositions = _catalogue(n_steels, n_elements, seed)
+    steels = Steels.from_arrays(
+        np.array([f'Grade {i}' for i in range(n_steels)], dtype=object),
+        np.random.default_rng(seed).integers(1850, 2020, n_steels),
+        np.arange(n_steels + 1) * n_elements,
+        to_numbers([s for comp in compositions for s in comp]),
+    )
+
+    results = {}
+    for name, draw in [
+        ('legacy', lambda: _legacy_run(steels)),
+        ('collection', lambda: run(NullSink(), steels)),
+    ]:
+        start = time.perf_counter()
+        figure = draw()
+        r = {'build s': time.perf_counter() - start}
+        for fmt in ['png', 'svg']:
+            buf = io.BytesIO()
+            start = time.perf_counter()
+            figure.savefig(buf, format=fmt)
+            r[f'{fmt} s'] = time.perf_counter() - start
+        r['svg MB'] = buf.tell() / 1e6
+        plt.close(figure)
+        results[name] = r
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the steel data structures.')
+    parser.add_argument('-n', '--n-steels', type=int, default=100000)
+    parser.add_argument('-k', '--n-elements', type=int, default=8)
+    parser.add_argument('--render', type=int, default=1000, help='the number of steels rendered')
+    args = parser.parse_args()
+
+    results = benchmark_memory(args.n_steels, args.n_elements)
+    print(f'Memory, {args.n_steels} steels x {args.n_elements} elements')
+    for name, r in results.items():
+        print(f'{name:>20}: {r["MB"]:8.1f} MB ({r["peak MB"]:8.1f} MB peak), {r["s"]:.2f} s')
+
+    plt.switch_backend('Agg')
+    results = benchmark_render(args.render, args.n_elements)
+    print(f'Rendering, {args.render} steels x {args.n_elements} elements')
+    for name, r in results.items():
+        print(f'{name:>20}: build {r["build s"]:.2f} s, png {r["png s"]:.2f} s, '
+              f'svg {r["svg s"]:.2f} s ({r["svg MB"]:.1f} MB)')
@@ -0,0 +1,213 @@
+from elements import numbers as atomic_numbers
+from typing import Optional, Tuple
+from composition import Steels
+import pandas as pd
+import numpy as np
+import argparse
+import json
+import time
+import os
+
+# Loading of alloy catalogues into Steels. Catalogues are read in chunks
+# straight into flat arrays (names, years, row pointers, atomic numbers, wt%),
+# with no Steel object per row; Steels.from_arrays then dedupes and sorts the
+# whole catalogue at once. Parsed catalogues are cached as .npz.
+#
+# CSV catalogues have a name and a year column and one column per element
+# symbol holding the wt%. Empty and zero cells mean the element is absent;
+# other non-numeric cells (e.g. 'x') mean present with unknown wt%.
+#
+# JSON catalogues are JSON lines (or one JSON list) of objects such as
+#   {"name": "AISI 304", "year": 1924, "composition": {"Cr": 18, "Ni": 8}}
+# where the composition may also be a list of symbols.
+
+
+def _csv_chunk(
+        chunk: pd.DataFrame,
+        name_column: str,
+        year_column: str,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Convert one chunk of a CSV catalogue to flat arrays.
+    :return: (names, years, lengths, numbers, wt)
+    """
+    symbols = [col for col in chunk.columns if col in atomic_numbers]
+    raw = chunk[symbols]
+    values = raw.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    present = raw.notna().to_numpy() & (values != 0)
+
+    # Row-major, so each steel's elements are contiguous and in column order
+    rows, cols = np.nonzero(present)
+    return (
+        chunk[name_column].astype(str).to_numpy(dtype=object),
+        chunk[year_column].to_numpy(dtype=np.int64),
+        present.sum(axis=1),
+        np.array([atomic_numbers[s] for s in symbols], dtype=np.uint8)[cols],
+        values[rows, cols],
+    )
+
+
+def read_csv(
+        path: str,
+        name_column: str = 'name',
+        year_column: str = 'year',
+        chunksize: int = 65536,
+        dedupe: bool = True,
+) -> Steels:
+    """
+    Read a CSV catalogue in chunks.
+    :param path: The csv file
+    :param name_column: The column of grade names
+    :param year_column: The column of years
+    :param chunksize: The number of rows parsed at a time
+    :param dedupe: Drop repeated steels
+    :return: Steels
+    """
+    parts = [
+        _csv_chunk(chunk, name_column, year_column)
+        for chunk in pd.read_csv(path, chunksize=chunksize, skipinitialspace=True)
+    ]
+    names, years, lengths, numbers, wt = (
+        np.concatenate([p[i] for p in parts]) if parts else np.empty(0)
+        for i in range(5)
+    )
+    indptr = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+    return Steels.from_arrays(names, years, indptr, numbers, wt, dedupe=dedupe)
+
+
+def _json_records(path: str):
+    """
+    Yield the records of a JSON lines file, or of a JSON list.
+    """
+    with open(path) as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        if first == '[':
+            f.seek(0)
+            yield from json.load(f)
+            return
+        f.seek(0)
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_json(
+        path: str,
+        dedupe: bool = True,
+) -> Steels:
+    """
+    Read a JSON catalogue, one record at a time.
+    :param path: The .json or .jsonl file
+    :param dedupe: Drop repeated steels
+    :return: Steels
+    """
+    names, years, lengths, numbers, wt = [], [], [], [], []
+    for record in _json_records(path):
+        composition = record['composition']
+        if isinstance(composition, dict):
+            symbols = list(composition)
+            values = [np.nan if v is None else float(v) for v in composition.values()]
+        else:
+            symbols = composition
+            values = [np.nan] * len(symbols)
+        names.append(str(record.get('name', 'None')))
+        years.append(int(record['year']))
+        lengths.append(len(symbols))
+        numbers.extend(atomic_numbers[s] for s in symbols)
+        wt.extend(values)
+    indptr = np.concatenate(([0], np.cumsum(lengths, dtype=np.int64)))
+    return Steels.from_arrays(
+        np.array(names, dtype=object),
+        np.array(years, dtype=np.int64),
+        indptr,
+        np.array(numbers, dtype=np.uint8),
+        np.array(wt, dtype=float),
+        dedupe=dedupe,
+    )
+
+
+def read(path: str, **kwargs) -> Steels:
+    """
+    Read a catalogue, by its extension.
+    :param path: A .csv, .json, .jsonl or .npz file
+    :param kwargs: Passed to the reader
+    :return: Steels
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        return read_csv(path, **kwargs)
+    if ext in ('.json', '.jsonl', '.ndjson'):
+        return read_json(path, **kwargs)
+    if ext == '.npz':
+        return load(path)
+    raise ValueError(f'Unknown catalogue format: {ext}')
+
+
+def save(steels: Steels, path: str):
+    """
+    Save parsed steels as .npz.
+    :param steels: The steels
+    :param path: The file
+    """
+    np.savez(
+        path,
+        names=steels.names.astype(str),
+        years=steels.years,
+        indptr=steels.indptr,
+        numbers=steels.numbers,
+        wt=steels.wt.data,
+    )
+
+
+def load(path: str) -> Steels:
+    """
+    Load steels saved by save. They are already deduped and sorted.
+    :param path: The .npz file
+    :return: Steels
+    """
+    with np.load(path) as f:
+        return Steels.from_arrays(
+            f['names'].astype(object),
+            f['years'],
+            f['indptr'],
+            f['numbers'],
+            f['wt'],
+            dedupe=False,
+        )
+
+
+def load_catalogue(
+        path: str,
+        cache: Optional[str] = None,
+        **kwargs,
+) -> Steels:
+    """
+    Load a catalogue, parsing it only if the cache is missing or older than
+    it.
+    :param path: The catalogue
+    :param cache: The .npz cache. If None, next to the catalogue.
+    :param kwargs: Passed to the reader
+    :return: Steels
+    """
+    cache = os.path.splitext(path)[0] + '.npz' if cache is None else cache
+    if os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(path):
+        return load(cache)
+    steels = read(path, **kwargs)
+    save(steels, cache)
+    return steels
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Parse an alloy catalogue and cache it as .npz.')
+    parser.add_argument('catalogue')
+    parser.add_argument('-o', '--output', default=None, help='the .npz cache (default: next to the catalogue)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    steels = read(args.catalogue)
+    output = args.output or os.path.splitext(args.catalogue)[0] + '.npz'
+    save(steels, output)
+    print(f'{len(steels)} steels, {len(steels.elements)} elements, {steels.incidence.nnz} entries '
+          f'in {time.perf_counter() - start:.1f} s -> {output}')
@@ -1,376 +1,374 @@
-class _ColorRed:
-    def __init__(self):
-        self.i50 = '#FFEBEE'
-        self.i100 = '#FFCDD2'
-        self.i200 = '#EF9A9A'
-        self.i300 = '#E57373'
-        self.i400 = '#EF5350'
-        self.i500 = '#F44336'
-        self.i600 = '#E53935'
-        self.i700 = '#D32F2F'
-        self.i800 = '#C62828'
-        self.i900 = '#B71C1C'
-        self.iA100 = '#FF8A80'
-        self.iA200 = '#FF5252'
-        self.iA400 = '#FF1744'
-        self.iA700 = '#D50000'
-
-
-class _ColorPink:
-    def __init__(self):
-        self.i50 = '#FCE4EC'
-        self.i100 = '#F8BBD0'
-        self.i200 = '#F48FB1'
-        self.i300 = '#F06292'
-        self.i400 = '#EC407A'
-        self.i500 = '#E91E63'
-        self.i600 = '#D81B60'
-        self.i700 = '#C2185B'
-        self.i800 = '#AD1457'
-        self.i900 = '#880E4F'
-        self.iA100 = '#FF80AB'
-        self.iA200 = '#FF4081'
-        self.iA400 = '#F50057'
-        self.iA700 = '#C51162'
-
-
-class _ColorPurple:
-    def __init__(self):
-        self.i50 = '#F3E5F5'
-        self.i100 = '#E1BEE7'
-        self.i200 = '#CE93D8'
-        self.i300 = '#BA68C8'
-        self.i400 = '#AB47BC'
-        self.i500 = '#9C27B0'
-        self.i600 = '#8E24AA'
-        self.i700 = '#7B1FA2'
-        self.i800 = '#6A1B9A'
-        self.i900 = '#4A148C'
-        self.iA100 = '#EA80FC'
-        self.iA200 = '#E040FB'
-        self.iA400 = '#D500F9'
-        self.iA700 = '#AA00FF'
-
-
-class _ColorDeepPurple:
-    def __init__(self):
-        self.i50 = '#EDE7F6'
-        self.i100 = '#D1C4E9'
-        self.i200 = '#B39DDB'
-        self.i300 = '#9575CD'
-        self.i400 = '#7E57C2'
-        self.i500 = '#673AB7'
-        self.i600 = '#5E35B1'
-        self.i700 = '#512DA8'
-        self.i800 = '#4527A0'
-        self.i900 = '#311B92'
-        self.iA100 = '#B388FF'
-        self.iA200 = '#7C4DFF'
-        self.iA400 = '#651FFF'
-        self.iA700 = '#6200EA'
-
-
-class _ColorIndigo:
-    def __init__(self):
-        self.i50 = '#E8EAF6'
-        self.i100 = '#C5CAE9'
-        self.i200 = '#9FA8DA'
-        self.i300 = '#7986CB'
-        self.i400 = '#5C6BC0'
-        self.i500 = '#3F51B5'
-        self.i600 = '#3949AB'
-        self.i700 = '#303F9F'
-        self.i800 = '#283593'
-        self.i900 = '#1A237E'
-        self.iA100 = '#8C9EFF'
-        self.iA200 = '#536DFE'
-        self.iA400 = '#3D5AFE'
-        self.iA700 = '#304FFE'
-
-
-class _ColorBlue:
-    def __init__(self):
-        self.i50 = '#E3F2FD'
-        self.i100 = '#BBDEFB'
-        self.i200 = '#90CAF9'
-        self.i300 = '#64B5F6'
-        self.i400 = '#42A5F5'
-        self.i500 = '#2196F3'
-        self.i600 = '#1E88E5'
-        self.i700 = '#1976D2'
-        self.i800 = '#1565C0'
-        self.i900 = '#0D47A1'
-        self.iA100 = '#82B1FF'
-        self.iA200 = '#448AFF'
-        self.iA400 = '#2979FF'
-        self.iA700 = '#2962FF'
-
-
-class _ColorLightBlue:
-    def __init__(self):
-        self.i50 = '#E1F5FE'
-        self.i100 = '#B3E5FC'
-        self.i200 = '#81D4FA'
-        self.i300 = '#4FC3F7'
-        self.i400 = '#29B6F6'
-        self.i500 = '#03A9F4'
-        self.i600 = '#039BE5'
-        self.i700 = '#0288D1'
-        self.i800 = '#0277BD'
-        self.i900 = '#01579B'
-        self.iA100 = '#80D8FF'
-        self.iA200 = '#40C4FF'
-        self.iA400 = '#00B0FF'
-        self.iA700 = '#0091EA'
-
-
-class _ColorCyan:
-    def __init__(self):
-        self.i50 = '#E0F7FA'
-        self.i100 = '#B2EBF2'
-        self.i200 = '#80DEEA'
-        self.i300 = '#4DD0E1'
-        self.i400 = '#26C6DA'
-        self.i500 = '#00BCD4'
-        self.i600 = '#00ACC1'
-        self.i700 = '#0097A7'
-        self.i800 = '#00838F'
-        self.i900 = '#006064'
-        self.iA100 = '#84FFFF'
-        self.iA200 = '#18FFFF'
-        self.iA400 = '#00E5FF'
-        self.iA700 = '#00B8D4'
-
-
-class _ColorTeal:
-    def __init__(self):
-        self.i50 = '#E0F2F1'
-        self.i100 = '#B2DFDB'
-        self.i200 = '#80CBC4'
-        self.i300 = '#4DB6AC'
-        self.i400 = '#26A69A'
-        self.i500 = '#009688'
-        self.i600 = '#00897B'
-        self.i700 = '#00796B'
-        self.i800 = '#00695C'
-        self.i900 = '#004D40'
-        self.iA100 = '#A7FFEB'
-        self.iA200 = '#64FFDA'
-        self.iA400 = '#1DE9B6'
-        self.iA700 = '#00BFA5'
-
-
-class _ColorGreen:
-    def __init__(self):
-        self.i50 = '#E8F5E9'
-        self.i100 = '#C8E6C9'
-        self.i200 = '#A5D6A7'
-        self.i300 = '#81C784'
-        self.i400 = '#66BB6A'
-        self.i500 = '#4CAF50'
-        self.i600 = '#43A047'
-        self.i700 = '#388E3C'
-        self.i800 = '#2E7D32'
-        self.i900 = '#1B5E20'
-        self.iA100 = '#B9F6CA'
-        self.iA200 = '#69F0AE'
-        self.iA400 = '#00E676'
-        self.iA700 = '#00C853'
-
-
-class _ColorLightGreen:
-    def __init__(self):
-        self.i50 = '#F1F8E9'
-        self.i100 = '#DCEDC8'
-        self.i200 = '#C5E1A5'
-        self.i300 = '#AED581'
-        self.i400 = '#9CCC65'
-        self.i500 = '#8BC34A'
-        self.i600 = '#7CB342'
-        self.i700 = '#689F38'
-        self.i800 = '#558B2F'
-        self.i900 = '#33691E'
-        self.iA100 = '#CCFF90'
-        self.iA200 = '#B2FF59'
-        self.iA400 = '#76FF03'
-        self.iA700 = '#64DD17'
-
-
-class _ColorLime:
-    def __init__(self):
-        self.i50 = '#F9FBE7'
-        self.i100 = '#F0F4C3'
-        self.i200 = '#E6EE9C'
-        self.i300 = '#DCE775'
-        self.i400 = '#D4E157'
-        self.i500 = '#CDDC39'
-        self.i600 = '#C0CA33'
-        self.i700 = '#AFB42B'
-        self.i800 = '#9E9D24'
-        self.i900 = '#827717'
-        self.iA100 = '#F4FF81'
-        self.iA200 = '#EEFF41'
-        self.iA400 = '#C6FF00'
-        self.iA700 = '#AEEA00'
-
-
-class _ColorYellow:
-    def __init__(self):
-        self.i50 = '#FFFDE7'
-        self.i100 = '#FFF9C4'
-        self.i200 = '#FFF59D'
-        self.i300 = '#FFF176'
-        self.i400 = '#FFEE58'
-        self.i500 = '#FFEB3B'
-        self.i600 = '#FDD835'
-        self.i700 = '#FBC02D'
-        self.i800 = '#F9A825'
-        self.i900 = '#F57F17'
-        self.iA100 = '#FFFF8D'
-        self.iA200 = '#FFFF00'
-        self.iA400 = '#FFEA00'
-        self.iA700 = '#FFD600'
-
-
-class _ColorAmber:
-    def __init__(self):
-        self.i50 = '#FFF8E1'
-        self.i100 = '#FFECB3'
-        self.i200 = '#FFE082'
-        self.i300 = '#FFD54F'
-        self.i400 = '#FFCA28'
-        self.i500 = '#FFC107'
-        self.i600 = '#FFB300'
-        self.i700 = '#FFA000'
-        self.i800 = '#FF8F00'
-        self.i900 = '#FF6F00'
-        self.iA100 = '#FFE57F'
-        self.iA200 = '#FFD740'
-        self.iA400 = '#FFC400'
-        self.iA700 = '#FFAB00'
-
-
-class _ColorOrange:
-    def __init__(self):
-        self.i50 = '#FFF3E0'
-        self.i100 = '#FFE0B2'
-        self.i200 = '#FFCC80'
-        self.i300 = '#FFB74D'
-        self.i400 = '#FFA726'
-        self.i500 = '#FF9800'
-        self.i600 = '#FB8C00'
-        self.i700 = '#F57C00'
-        self.i800 = '#EF6C00'
-        self.i900 = '#E65100'
-        self.iA100 = '#FFD180'
-        self.iA200 = '#FFAB40'
-        self.iA400 = '#FF9100'
-        self.iA700 = '#FF6D00'
-
-
-class _ColorDeepOrange:
-    def __init__(self):
-        self.i50 = '#FBE9E7'
-        self.i100 = '#FFCCBC'
-        self.i200 = '#FFAB91'
-        self.i300 = '#FF8A65'
-        self.i400 = '#FF7043'
-        self.i500 = '#FF5722'
-        self.i600 = '#F4511E'
-        self.i700 = '#E64A19'
-        self.i800 = '#D84315'
-        self.i900 = '#BF360C'
-        self.iA100 = '#FF9E80'
-        self.iA200 = '#FF6E40'
-        self.iA400 = '#FF3D00'
-        self.iA700 = '#DD2C00'
-
-
-class _ColorBrown:
-    def __init__(self):
-        self.i50 = '#EFEBE9'
-        self.i100 = '#D7CCC8'
-        self.i200 = '#BCAAA4'
-        self.i300 = '#A1887F'
-        self.i400 = '#8D6E63'
-        self.i500 = '#795548'
-        self.i600 = '#6D4C41'
-        self.i700 = '#5D4037'
-        self.i800 = '#4E342E'
-        self.i900 = '#3E2723'
-
-
-class _ColorGray:
-    def __init__(self):
-        self.i50 = '#FAFAFA'
-        self.i100 = '#F5F5F5'
-        self.i200 = '#EEEEEE'
-        self.i300 = '#E0E0E0'
-        self.i400 = '#BDBDBD'
-        self.i500 = '#9E9E9E'
-        self.i600 = '#757575'
-        self.i700 = '#616161'
-        self.i800 = '#424242'
-        self.i900 = '#212121'
-
-
-class _ColorBlueGray:
-    def __init__(self):
-        self.i50 = '#ECEFF1'
-        self.i100 = '#CFD8DC'
-        self.i200 = '#B0BEC5'
-        self.i300 = '#90A4AE'
-        self.i400 = '#78909C'
-        self.i500 = '#607D8B'
-        self.i600 = '#546E7A'
-        self.i700 = '#455A64'
-        self.i800 = '#37474F'
-        self.i900 = '#263238'
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import numpy as np
+
+# Material design palettes. Each palette is a row of hex colors, one per shade,
+# in a single table; palettes are only built when first used, e.g. c.pink.i400
+# or its alias c.p.i400 (the same object).
+
+# Shade names, in table order. Brown, gray and blue gray have no accents.
+shades = ('50', '100', '200', '300', '400', '500', '600', '700', '800', '900', 'A100', 'A200', 'A400', 'A700')
+_shade_index = {s: i for i, s in enumerate(shades)}
+
+# Palette -> hex color of each shade
+table: Dict[str, tuple] = {
+    'red': (
+        '#FFEBEE', '#FFCDD2', '#EF9A9A', '#E57373', '#EF5350',
+        '#F44336', '#E53935', '#D32F2F', '#C62828', '#B71C1C',
+        '#FF8A80', '#FF5252', '#FF1744', '#D50000',
+    ),
+    'pink': (
+        '#FCE4EC', '#F8BBD0', '#F48FB1', '#F06292', '#EC407A',
+        '#E91E63', '#D81B60', '#C2185B', '#AD1457', '#880E4F',
+        '#FF80AB', '#FF4081', '#F50057', '#C51162',
+    ),
+    'purple': (
+        '#F3E5F5', '#E1BEE7', '#CE93D8', '#BA68C8', '#AB47BC',
+        '#9C27B0', '#8E24AA', '#7B1FA2', '#6A1B9A', '#4A148C',
+        '#EA80FC', '#E040FB', '#D500F9', '#AA00FF',
+    ),
+    'deeppurple': (
+        '#EDE7F6', '#D1C4E9', '#B39DDB', '#9575CD', '#7E57C2',
+        '#673AB7', '#5E35B1', '#512DA8', '#4527A0', '#311B92',
+        '#B388FF', '#7C4DFF', '#651FFF', '#6200EA',
+    ),
+    'indigo': (
+        '#E8EAF6', '#C5CAE9', '#9FA8DA', '#7986CB', '#5C6BC0',
+        '#3F51B5', '#3949AB', '#303F9F', '#283593', '#1A237E',
+        '#8C9EFF', '#536DFE', '#3D5AFE', '#304FFE',
+    ),
+    'blue': (
+        '#E3F2FD', '#BBDEFB', '#90CAF9', '#64B5F6', '#42A5F5',
+        '#2196F3', '#1E88E5', '#1976D2', '#1565C0', '#0D47A1',
+        '#82B1FF', '#448AFF', '#2979FF', '#2962FF',
+    ),
+    'lightblue': (
+        '#E1F5FE', '#B3E5FC', '#81D4FA', '#4FC3F7', '#29B6F6',
+        '#03A9F4', '#039BE5', '#0288D1', '#0277BD', '#01579B',
+        '#80D8FF', '#40C4FF', '#00B0FF', '#0091EA',
+    ),
+    'cyan': (
+        '#E0F7FA', '#B2EBF2', '#80DEEA', '#4DD0E1', '#26C6DA',
+        '#00BCD4', '#00ACC1', '#0097A7', '#00838F', '#006064',
+        '#84FFFF', '#18FFFF', '#00E5FF', '#00B8D4',
+    ),
+    'teal': (
+        '#E0F2F1', '#B2DFDB', '#80CBC4', '#4DB6AC', '#26A69A',
+        '#009688', '#00897B', '#00796B', '#00695C', '#004D40',
+        '#A7FFEB', '#64FFDA', '#1DE9B6', '#00BFA5',
+    ),
+    'green': (
+        '#E8F5E9', '#C8E6C9', '#A5D6A7', '#81C784', '#66BB6A',
+        '#4CAF50', '#43A047', '#388E3C', '#2E7D32', '#1B5E20',
+        '#B9F6CA', '#69F0AE', '#00E676', '#00C853',
+    ),
+    'lightgreen': (
+        '#F1F8E9', '#DCEDC8', '#C5E1A5', '#AED581', '#9CCC65',
+        '#8BC34A', '#7CB342', '#689F38', '#558B2F', '#33691E',
+        '#CCFF90', '#B2FF59', '#76FF03', '#64DD17',
+    ),
+    'lime': (
+        '#F9FBE7', '#F0F4C3', '#E6EE9C', '#DCE775', '#D4E157',
+        '#CDDC39', '#C0CA33', '#AFB42B', '#9E9D24', '#827717',
+        '#F4FF81', '#EEFF41', '#C6FF00', '#AEEA00',
+    ),
+    'yellow': (
+        '#FFFDE7', '#FFF9C4', '#FFF59D', '#FFF176', '#FFEE58',
+        '#FFEB3B', '#FDD835', '#FBC02D', '#F9A825', '#F57F17',
+        '#FFFF8D', '#FFFF00', '#FFEA00', '#FFD600',
+    ),
+    'amber': (
+        '#FFF8E1', '#FFECB3', '#FFE082', '#FFD54F', '#FFCA28',
+        '#FFC107', '#FFB300', '#FFA000', '#FF8F00', '#FF6F00',
+        '#FFE57F', '#FFD740', '#FFC400', '#FFAB00',
+    ),
+    'orange': (
+        '#FFF3E0', '#FFE0B2', '#FFCC80', '#FFB74D', '#FFA726',
+        '#FF9800', '#FB8C00', '#F57C00', '#EF6C00', '#E65100',
+        '#FFD180', '#FFAB40', '#FF9100', '#FF6D00',
+    ),
+    'deeporange': (
+        '#FBE9E7', '#FFCCBC', '#FFAB91', '#FF8A65', '#FF7043',
+        '#FF5722', '#F4511E', '#E64A19', '#D84315', '#BF360C',
+        '#FF9E80', '#FF6E40', '#FF3D00', '#DD2C00',
+    ),
+    'brown': (
+        '#EFEBE9', '#D7CCC8', '#BCAAA4', '#A1887F', '#8D6E63',
+        '#795548', '#6D4C41', '#5D4037', '#4E342E', '#3E2723',
+    ),
+    'gray': (
+        '#FAFAFA', '#F5F5F5', '#EEEEEE', '#E0E0E0', '#BDBDBD',
+        '#9E9E9E', '#757575', '#616161', '#424242', '#212121',
+    ),
+    'bluegray': (
+        '#ECEFF1', '#CFD8DC', '#B0BEC5', '#90A4AE', '#78909C',
+        '#607D8B', '#546E7A', '#455A64', '#37474F', '#263238',
+    ),
+}
+
+# Short names
+aliases = {
+    'r': 'red',
+    'p': 'pink',
+    'pu': 'purple',
+    'dp': 'deeppurple',
+    'i': 'indigo',
+    'b': 'blue',
+    'lb': 'lightblue',
+    'c': 'cyan',
+    't': 'teal',
+    'g': 'green',
+    'lg': 'lightgreen',
+    'l': 'lime',
+    'y': 'yellow',
+    'a': 'amber',
+    'o': 'orange',
+    'do': 'deeporange',
+    'br': 'brown',
+    'gr': 'gray',
+    'bg': 'bluegray',
+}
+
+
+def to_rgba(
+        hexes: Union[str, Iterable[str]],
+        alpha: Union[float, Iterable[float]] = 1,
+        dtype=float,
+) -> np.ndarray:
+    """
+    Convert #RRGGBB colors to RGBA, all at once.
+    :param hexes: The colors
+    :param alpha: The alpha, for all colors or for each color
+    :param dtype: float for values in [0, 1], or np.uint8 for values in
+    [0, 255]
+    :return: An array of shape n x 4 (or 4 for a single color)
+    """
+    single = isinstance(hexes, str)
+    hexes = [hexes] if single else list(hexes)
+    digits = ''.join(h.lstrip('#') for h in hexes)
+    if len(digits) != 6 * len(hexes):
+        raise ValueError('Colors must be of the form #RRGGBB')
+    rgb = np.frombuffer(bytes.fromhex(digits), dtype=np.uint8).reshape(-1, 3)
+    alpha = np.broadcast_to(np.asarray(alpha, dtype=float), (len(hexes),))
+    if np.dtype(dtype) == np.uint8:
+        rgba = np.empty((len(hexes), 4), dtype=np.uint8)
+        rgba[:, :3] = rgb
+        rgba[:, 3] = np.round(alpha * 255)
+    else:
+        rgba = np.empty((len(hexes), 4), dtype=dtype)
+        rgba[:, :3] = rgb / 255
+        rgba[:, 3] = alpha
+    return rgba[0] if single else rgba
+
+
+class Palette:
+    """
+    The shades of one color. Shades are read as attributes (p.i400, p.iA200)
+    or items (p[400], p['A200']).
+    """
+    __slots__ = ('name', 'hexes')
+
+    def __init__(self, name: str):
+        """
+        :param name: The palette name, in table
+        """
+        self.name = name
+        self.hexes = table[name]
+
+    def __getitem__(self, shade: Union[int, str]) -> str:
+        i = _shade_index.get(str(shade))
+        if i is None or i >= len(self.hexes):
+            raise KeyError(f'{self.name} has no shade {shade}')
+        return self.hexes[i]
+
+    def __getattr__(self, attr: str) -> str:
+        if attr.startswith('i'):
+            try:
+                return self[attr[1:]]
+            except KeyError:
+                pass
+        raise AttributeError(attr)
+
+    def __dir__(self) -> List[str]:
+        return ['i' + s for s in self.shades]
+
+    def __len__(self) -> int:
+        return len(self.hexes)
+
+    def __repr__(self) -> str:
+        return f'Palette({self.name!r})'
+
+    @property
+    def shades(self) -> tuple:
+        return shades[:len(self.hexes)]
+
+    def rgba(
+            self,
+            alpha: float = 1,
+            dtype=float,
+    ) -> np.ndarray:
+        """
+        :param alpha: The alpha
+        :param dtype: See to_rgba
+        :return: The RGBA of every shade, of shape n_shades x 4
+        """
+        return to_rgba(self.hexes, alpha, dtype)
 
 
 class _Colors:
-    def __init__(self):
-        # Full names
-        self.red = _ColorRed()
-        self.pink = _ColorPink()
-        self.purple = _ColorPurple()
-        self.deeppurple = _ColorDeepPurple()
-        self.indigo = _ColorIndigo()
-        self.blue = _ColorBlue()
-        self.lightblue = _ColorLightBlue()
-        self.cyan = _ColorCyan()
-        self.teal = _ColorTeal()
-        self.green = _ColorGreen()
-        self.lightgreen = _ColorLightGreen()
-        self.lime = _ColorLime()
-        self.yellow = _ColorYellow()
-        self.amber = _ColorAmber()
-        self.orange = _ColorOrange()
-        self.deeporange = _ColorDeepOrange()
-        self.brown = _ColorBrown()
-        self.gray = _ColorGray()
-        self.bluegray = _ColorBlueGray()
-
-        # Short names
-        self.r = _ColorRed()
-        self.p = _ColorPink()
-        self.pu = _ColorPurple()
-        self.dp = _ColorDeepPurple()
-        self.i = _ColorIndigo()
-        self.b = _ColorBlue()
-        self.lb = _ColorLightBlue()
-        self.c = _ColorCyan()
-        self.t = _ColorTeal()
-        self.g = _ColorGreen()
-        self.lg = _ColorLightGreen()
-        self.l = _ColorLime()
-        self.y = _ColorYellow()
-        self.a = _ColorAmber()
-        self.o = _ColorOrange()
-        self.do = _ColorDeepOrange()
-        self.br = _ColorBrown()
-        self.gr = _ColorGray()
-        self.bg = _ColorBlueGray()
-
-
-c = _Colors()
\ No newline at end of file
+    """
+    Every palette, by full or short name. Each palette is built on first
+    access and then stored under both its names.
+    """
+    def __getattr__(self, name: str) -> Palette:
+        full = aliases.get(name, name)
+        if full not in table:
+            raise AttributeError(name)
+        palette = self.__dict__.get(full)
+        if palette is None:
+            palette = self.__dict__[full] = Palette(full)
+        self.__dict__[name] = palette
+        return palette
+
+    def __dir__(self) -> List[str]:
+        return list(table) + list(aliases)
+
+    def __iter__(self):
+        return (getattr(self, name) for name in table)
+
+
+class Gradient:
+    """
+    A precomputed color lookup table. Values are colored by scaling them to
+    an integer index and gathering rows of the table, the same binning that
+    matplotlib colormaps use, so coloring many points is one gather.
+    Missing (non-finite) values get the bad color.
+    """
+    __slots__ = ('name', 'lut', 'lut_float', 'bad')
+
+    def __init__(
+            self,
+            lut: np.ndarray,
+            name: str = 'gradient',
+            bad: Tuple[float, float, float, float] = (0, 0, 0, 0),
+    ):
+        """
+        :param lut: RGBA rows, uint8 (0 to 255) or float (0 to 1)
+        :param name: The name, used for the colormap
+        :param bad: The float RGBA of missing values. Transparent by default,
+        as in matplotlib colormaps.
+        """
+        lut = np.asarray(lut)
+        self.name = name
+        self.bad = np.asarray(bad, dtype=float)
+        if lut.dtype == np.uint8:
+            self.lut = lut
+            self.lut_float = lut / 255
+        else:
+            self.lut_float = lut.astype(float)
+            self.lut = (self.lut_float * 255).astype(np.uint8)
+
+    @classmethod
+    def from_palette(
+            cls,
+            palette: Union[str, Palette],
+            start: Union[int, str] = 50,
+            stop: Union[int, str] = 900,
+            n: int = 256,
+    ) -> 'Gradient':
+        """
+        A gradient through the shades of a palette, interpolated in RGB.
+        :param palette: The palette, or its name or alias
+        :param start: The first shade
+        :param stop: The last shade
+        :param n: The number of table rows
+        :return: Gradient
+        """
+        palette = getattr(c, palette) if isinstance(palette, str) else palette
+        i, j = _shade_index[str(start)], _shade_index[str(stop)]
+        step = 1 if j >= i else -1
+        rgba = palette.rgba()[i:j + step if j + step >= 0 else None:step]
+        x = np.linspace(0, 1, len(rgba))
+        t = np.linspace(0, 1, n)
+        lut = np.column_stack([np.interp(t, x, rgba[:, k]) for k in range(4)])
+        return cls(lut, f'{palette.name}_{start}_{stop}')
+
+    @classmethod
+    def from_cmap(
+            cls,
+            cmap,
+            n: Optional[int] = None,
+    ) -> 'Gradient':
+        """
+        The table of a matplotlib colormap.
+        :param cmap: The colormap, or its name
+        :param n: The number of table rows. If None, the colormap's own.
+        :return: Gradient
+        """
+        import matplotlib as mpl
+        cmap = mpl.colormaps[cmap] if isinstance(cmap, str) else cmap
+        if n is not None:
+            cmap = cmap.resampled(n)
+        return cls(cmap(np.arange(cmap.N)), cmap.name, cmap.get_bad())
+
+    def __len__(self) -> int:
+        return len(self.lut)
+
+    def index(
+            self,
+            values: np.ndarray,
+            vmin: float = 0,
+            vmax: float = 1,
+    ) -> np.ndarray:
+        """
+        :param values: The values
+        :param vmin: The value of the first row
+        :param vmax: The value of the last row
+        :return: The table row of each value, from -1 (below vmin) to
+        len(self) (above vmax). Non-finite values get row 0.
+        """
+        n = len(self.lut)
+        x = np.asarray(values, dtype=float)
+
+        # As matplotlib's Normalize, a degenerate range maps to the first row
+        if vmax == vmin:
+            return np.zeros(x.shape, dtype=np.intp)
+
+        x = (x - vmin) * (n / (vmax - vmin))
+        x = np.where(np.isfinite(x), x, 0)
+        np.clip(x, -1, n, out=x)
+        return x.astype(np.intp)
+
+    def __call__(
+            self,
+            values: np.ndarray,
+            vmin: float = 0,
+            vmax: float = 1,
+            bytes: bool = False,
+    ) -> np.ndarray:
+        """
+        Color values.
+        :param values: The values
+        :param vmin: The value of the first row
+        :param vmax: The value of the last row
+        :param bytes: Return uint8 RGBA instead of float
+        :return: RGBA of shape values.shape + (4,)
+        """
+        values = np.asarray(values, dtype=float)
+        lut = self.lut if bytes else self.lut_float
+        rgba = lut.take(self.index(values, vmin, vmax), axis=0, mode='clip')
+        bad = ~np.isfinite(values)
+        if bad.any():
+            rgba[bad] = (self.bad * 255).astype(np.uint8) if bytes else self.bad
+        return rgba
+
+    def colormap(self):
+        """
+        :return: A matplotlib ListedColormap of the table
+        """
+        from matplotlib.colors import ListedColormap
+        cmap = ListedColormap(self.lut_float, name=self.name)
+        cmap.set_bad(self.bad)
+        return cmap
+
+
+c = _Colors()
@@ -0,0 +1,231 @@
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple, Union
+from elements import Element, table, symbol_array, to_numbers
+import scipy.sparse as sp
+import numpy as np
+
+# The steel data model: steels as atomic numbers and wt%, and catalogues of
+# steels as sorted flat arrays with a sparse composition matrix. Kept apart
+# from the plotting so that loaders and analyses don't import matplotlib.
+
+
+class Steel:
+    """
+    A Steel with many elements, stored as atomic numbers and, optionally, the
+    wt% of each.
+    """
+    __slots__ = ('name', 'year', 'numbers', 'wt')
+
+    def __init__(
+            self,
+            elements: List[Union[Element, str]],
+            year: int,
+            name: str = 'None',
+            wt: Optional[List[float]] = None,
+    ):
+        """
+        :param elements: The elements, or their symbols
+        :param year: The year the steel was introduced
+        :param name: The name of the steel
+        :param wt: The wt% of each element, if known
+        """
+        if wt is not None and len(wt) != len(elements):
+            raise ValueError(f'{name}: {len(elements)} elements but {len(wt)} wt% values')
+        self.name = name
+        self.year = year
+        self.numbers = to_numbers(elements)
+        self.wt = None if wt is None else np.asarray(wt, dtype=np.float32)
+
+    @property
+    def elements(self) -> Tuple[Element, ...]:
+        return tuple(table[n - 1] for n in self.numbers)
+
+    def __lt__(self, other):
+        return self.year < other.year
+
+    def __len__(self):
+        return len(self.numbers)
+
+
+class Steels:
+    """
+    A list of steels to plot, sorted by year, with an index of their elements
+    and a sparse steel x element composition matrix.
+    """
+    def __init__(
+            self,
+            steels: List[Steel],
+    ):
+        """
+        :param steels: The steels, in any order
+        """
+        lengths = [len(i_steel) for i_steel in steels]
+        wt = [
+            np.full(n, np.nan) if i_steel.wt is None else i_steel.wt
+            for i_steel, n in zip(steels, lengths)
+        ]
+        self._build(
+            np.array([i_steel.name for i_steel in steels], dtype=object),
+            np.array([i_steel.year for i_steel in steels], dtype=np.int64),
+            np.concatenate(([0], np.cumsum(lengths))).astype(np.int64),
+            np.concatenate([i_steel.numbers for i_steel in steels] or [np.empty(0, np.uint8)]),
+            np.concatenate(wt or [np.empty(0)]),
+        )
+
+    @classmethod
+    def from_arrays(
+            cls,
+            names: np.ndarray,
+            years: np.ndarray,
+            indptr: np.ndarray,
+            numbers: np.ndarray,
+            wt: Optional[np.ndarray] = None,
+            dedupe: bool = True,
+    ) -> 'Steels':
+        """
+        Build from flat arrays, without a Steel object per row. Steel i has the
+        elements numbers[indptr[i]:indptr[i + 1]].
+        :param names: The name of each steel
+        :param years: The year of each steel
+        :param indptr: Row pointers, of length n_steels + 1
+        :param numbers: The atomic numbers of every steel's elements
+        :param wt: The wt% of every steel's elements, NaN where unknown. If
+        None, all unknown.
+        :param dedupe: Drop repeated steels (same name, year and set of
+        elements), keeping the first
+        :return: Steels
+        """
+        names = np.asarray(names, dtype=object)
+        years = np.asarray(years, dtype=np.int64)
+        indptr = np.asarray(indptr, dtype=np.int64)
+        numbers = np.asarray(numbers, dtype=np.uint8)
+        wt = np.full(len(numbers), np.nan) if wt is None else np.asarray(wt, dtype=float)
+
+        if dedupe and len(names):
+            # Each composition as a 128 bit set of atomic numbers
+            row = np.repeat(np.arange(len(names)), np.diff(indptr))
+            bits = np.zeros((len(names), 2), dtype=np.uint64)
+            bit = np.left_shift(np.uint64(1), (numbers % 64).astype(np.uint64))
+            np.bitwise_or.at(bits, (row, numbers // 64), bit)
+            name_codes = np.unique(names.astype(str), return_inverse=True)[1]
+            keys = np.column_stack((name_codes.astype(np.uint64), years.astype(np.uint64), bits))
+            first = np.sort(np.unique(keys, axis=0, return_index=True)[1])
+            names, years, indptr, numbers, wt = _take(first, names, years, indptr, numbers, wt)
+
+        steels = cls.__new__(cls)
+        steels._build(names, years, indptr, numbers, wt)
+        return steels
+
+    def _build(
+            self,
+            names: np.ndarray,
+            years: np.ndarray,
+            indptr: np.ndarray,
+            numbers: np.ndarray,
+            wt: np.ndarray,
+    ):
+        # Sort by year, keeping the given order within a year
+        order = np.argsort(years, kind='stable')
+        names, years, indptr, numbers, wt = _take(order, names, years, indptr, numbers, wt)
+        self.names = names
+        self.years = years
+
+        # Index each element in the order they appear
+        unique, first = np.unique(numbers, return_index=True)
+        order = unique[np.argsort(first)]
+        self.elements = symbol_array[order]
+        self.index: Dict[str, int] = {e: i for i, e in enumerate(self.elements.tolist())}
+
+        # Atomic number -> column
+        column = np.zeros(len(symbol_array), dtype=np.int32)
+        column[order] = np.arange(len(order))
+
+        # Composition matrices. Rows keep the order of each steel's elements.
+        indices = column[numbers]
+        shape = (len(names), len(self.elements))
+        self.incidence = sp.csr_matrix(
+            (np.ones(len(indices), dtype=np.int8), indices, indptr),
+            shape=shape,
+        )
+
+        # wt%, NaN where unknown
+        self.wt = sp.csr_matrix((wt, indices, indptr), shape=shape)
+
+    @property
+    def indptr(self) -> np.ndarray:
+        return self.incidence.indptr
+
+    @property
+    def numbers(self) -> np.ndarray:
+        """
+        The atomic numbers of every steel's elements, in row order.
+        """
+        return to_numbers(self.elements)[self.incidence.indices]
+
+    def lengths(self) -> np.ndarray:
+        """
+        :return: The number of elements in each steel
+        """
+        return np.diff(self.incidence.indptr)
+
+    @cached_property
+    def steels(self) -> List[Steel]:
+        """
+        The steels as Steel objects. Built on first use.
+        """
+        indptr = self.incidence.indptr
+        numbers = self.numbers
+        wt = self.wt.data
+        return [
+            Steel(
+                numbers[a:b],
+                int(year),
+                name,
+                None if np.isnan(wt[a:b]).all() else wt[a:b],
+            )
+            for name, year, a, b in zip(self.names, self.years, indptr[:-1], indptr[1:])
+        ]
+
+    def columns(self, i: int) -> np.ndarray:
+        """
+        :param i: The steel's position
+        :return: The element positions of the steel
+        """
+        return self.incidence.indices[self.incidence.indptr[i]:self.incidence.indptr[i + 1]]
+
+    def containing(self, name: str) -> np.ndarray:
+        """
+        :param name: The element
+        :return: The positions of the steels that contain the element
+        """
+        if name not in self.index:
+            return np.empty(0, dtype=np.int64)
+        return self.incidence[:, self.index[name]].nonzero()[0]
+
+    def counts(self) -> np.ndarray:
+        """
+        :return: The number of steels containing each element
+        """
+        return np.bincount(self.incidence.indices, minlength=len(self.elements))
+
+    def __len__(self):
+        return len(self.names)
+
+
+def _take(
+        rows: np.ndarray,
+        names: np.ndarray,
+        years: np.ndarray,
+        indptr: np.ndarray,
+        numbers: np.ndarray,
+        wt: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Select and reorder the rows of flat steel arrays.
+    :param rows: The rows to keep, in their new order
+    :return: (names, years, indptr, numbers, wt)
+    """
+    lengths = np.diff(indptr)[rows]
+    new_indptr = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+    gather = np.repeat(indptr[rows] - new_indptr[:-1], lengths) + np.arange(new_indptr[-1])
+    return names[rows], years[rows], new_indptr, numbers[gather], wt[gather]
@@ -0,0 +1,82 @@
+from typing import Dict, Iterable, Union
+import numpy as np
+
+# The periodic table as interned singletons. Element('Fe') always returns the
+# same object, so a catalogue of steels holds one object per element rather
+# than one per use, and steels can store atomic numbers instead of objects.
+
+symbols = (
+    'H', 'He',
+    'Li', 'Be', 'B', 'C', 'N', 'O', 'F', 'Ne',
+    'Na', 'Mg', 'Al', 'Si', 'P', 'S', 'Cl', 'Ar',
+    'K', 'Ca', 'Sc', 'Ti', 'V', 'Cr', 'Mn', 'Fe', 'Co', 'Ni', 'Cu', 'Zn',
+    'Ga', 'Ge', 'As', 'Se', 'Br', 'Kr',
+    'Rb', 'Sr', 'Y', 'Zr', 'Nb', 'Mo', 'Tc', 'Ru', 'Rh', 'Pd', 'Ag', 'Cd',
+    'In', 'Sn', 'Sb', 'Te', 'I', 'Xe',
+    'Cs', 'Ba',
+    'La', 'Ce', 'Pr', 'Nd', 'Pm', 'Sm', 'Eu', 'Gd', 'Tb', 'Dy', 'Ho', 'Er', 'Tm', 'Yb', 'Lu',
+    'Hf', 'Ta', 'W', 'Re', 'Os', 'Ir', 'Pt', 'Au', 'Hg',
+    'Tl', 'Pb', 'Bi', 'Po', 'At', 'Rn',
+    'Fr', 'Ra',
+    'Ac', 'Th', 'Pa', 'U', 'Np', 'Pu', 'Am', 'Cm', 'Bk', 'Cf', 'Es', 'Fm', 'Md', 'No', 'Lr',
+    'Rf', 'Db', 'Sg', 'Bh', 'Hs', 'Mt', 'Ds', 'Rg', 'Cn',
+    'Nh', 'Fl', 'Mc', 'Lv', 'Ts', 'Og',
+)
+
+# Symbol -> atomic number
+numbers: Dict[str, int] = {s: i + 1 for i, s in enumerate(symbols)}
+
+
+class Element:
+    """
+    A chemical element. There is one instance per symbol.
+    """
+    __slots__ = ('symbol', 'number')
+    _registry: Dict[str, 'Element'] = {}
+
+    def __new__(cls, symbol: str):
+        """
+        :param symbol: The element symbol, e.g. 'Fe'
+        """
+        element = cls._registry.get(symbol)
+        if element is None:
+            if symbol not in numbers:
+                raise KeyError(f'Unknown element: {symbol}')
+            element = super().__new__(cls)
+            element.symbol = symbol
+            element.number = numbers[symbol]
+            cls._registry[symbol] = element
+        return element
+
+    @property
+    def name(self) -> str:
+        return self.symbol
+
+    def __repr__(self) -> str:
+        return f'Element({self.symbol!r})'
+
+    def __reduce__(self):
+        return Element, (self.symbol,)
+
+
+# Every element, by atomic number - 1
+table = tuple(Element(s) for s in symbols)
+
+# Symbol lookup by atomic number, for vectorized conversion
+symbol_array = np.array(('',) + symbols)
+
+# Module attributes for each symbol, e.g. elements.Fe
+globals().update({e.symbol: e for e in table})
+
+
+def to_numbers(elements: Iterable[Union[Element, str]]) -> np.ndarray:
+    """
+    :param elements: Elements, symbols or atomic numbers
+    :return: The atomic numbers, as uint8
+    """
+    if isinstance(elements, np.ndarray) and elements.dtype.kind in 'iu':
+        return elements.astype(np.uint8)
+    return np.array([
+        e.number if isinstance(e, Element) else numbers[e]
+        for e in elements
+    ], dtype=np.uint8)
@@ -0,0 +1,200 @@
+from typing import Optional, TYPE_CHECKING
+from scipy.special import ndtr
+import numpy as np
+import time
+
+if TYPE_CHECKING:
+    from sklearn.gaussian_process import GaussianProcessRegressor
+
+# Choose the next samples of a closed-loop experiment from a fitted GP, such
+# as the one returned by surface.run or morphology_data.run. Every step scores
+# a whole set of points with a single call to predict.
+
+
+def expected_improvement(
+        mu: np.ndarray,
+        sigma: np.ndarray,
+        y_best: float,
+        xi: float = 0.01,
+) -> np.ndarray:
+    """
+    Expected improvement over the best observation (maximization).
+    :param mu: The posterior means
+    :param sigma: The posterior standard deviations
+    :param y_best: The best value observed so far
+    :param xi: Exploration margin added to y_best
+    :return: An array the shape of mu
+    """
+    imp = mu - y_best - xi
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = imp / sigma
+        ei = imp * ndtr(z) + sigma * np.exp(-z ** 2 / 2) / np.sqrt(2 * np.pi)
+    return np.where(sigma > 0, ei, 0)
+
+
+def upper_confidence_bound(
+        mu: np.ndarray,
+        sigma: np.ndarray,
+        y_best: float = None,
+        kappa: float = 2.0,
+) -> np.ndarray:
+    """
+    Upper confidence bound (maximization).
+    :param mu: The posterior means
+    :param sigma: The posterior standard deviations
+    :param y_best: Unused, accepted so that all acquisitions share a signature
+    :param kappa: The weight given to the standard deviation
+    :return: An array the shape of mu
+    """
+    return mu + kappa * sigma
+
+
+acquisitions = {
+    'ei': expected_improvement,
+    'ucb': upper_confidence_bound,
+}
+
+
+def _posterior(
+        model: 'GaussianProcessRegressor',
+        x: np.ndarray,
+        sign: float,
+) -> tuple:
+    """
+    Predict the posterior mean and standard deviation as flat arrays.
+    :param model: The fitted GP
+    :param x: The points of shape n x d
+    :param sign: 1 to maximize, -1 to minimize
+    :return: (mu, sigma)
+    """
+    mu, sigma = model.predict(x, return_std=True)
+    return sign * mu.reshape(len(x), -1)[:, 0], sigma.reshape(len(x), -1)[:, 0]
+
+
+def propose(
+        model: 'GaussianProcessRegressor',
+        bounds: np.ndarray,
+        q: int = 1,
+        acquisition: str = 'ei',
+        maximize: bool = True,
+        n_candidates: int = 2048,
+        n_starts: int = 16,
+        n_steps: int = 8,
+        n_pool: int = 128,
+        seed: Optional[int] = None,
+        **kwargs,
+) -> np.ndarray:
+    """
+    Propose the next batch of samples.
+
+    A random candidate set is scored in one call. The best candidates seed a
+    multi-start local search in which every start is perturbed and rescored
+    together. Batches (q > 1) are chosen greedily from a pool of the best
+    points using the joint posterior covariance: each pick is treated as
+    observed at its mean (kriging believer) and the covariance of the rest of
+    the pool is conditioned on it.
+    :param model: A fitted GaussianProcessRegressor
+    :param bounds: The search space, of shape d x 2 (lower, upper)
+    :param q: The number of points to propose
+    :param acquisition: 'ei' or 'ucb'
+    :param maximize: If False, the objective is minimized
+    :param n_candidates: The number of random candidates
+    :param n_starts: The number of local searches
+    :param n_steps: The number of local search steps
+    :param n_pool: The number of points that batches are chosen from. The
+    pool is enlarged to at least q points.
+    :param seed: Seed for the candidates and perturbations
+    :param kwargs: Passed to the acquisition function, e.g. xi or kappa
+    :return: An array of shape q x d
+    """
+
+    if q > n_candidates:
+        raise ValueError(f'Cannot propose {q} points from {n_candidates} candidates')
+    f = acquisitions[acquisition]
+    bounds = np.asarray(bounds, dtype=float)
+    lower, upper = bounds[:, 0], bounds[:, 1]
+    span = upper - lower
+    d = len(bounds)
+    sign = 1.0 if maximize else -1.0
+    rng = np.random.default_rng(seed)
+
+    # The incumbent is the best posterior mean at the training points
+    y_best = np.max(_posterior(model, model.X_train_, sign)[0])
+
+    def score(x):
+        return f(*_posterior(model, x, sign), y_best, **kwargs)
+
+    # Score the random candidate set
+    x_cand = lower + rng.random((n_candidates, d)) * span
+    s_cand = score(x_cand)
+
+    # Refine the best candidates with a shrinking random local search
+    order = np.argsort(s_cand)[::-1]
+    x_start = x_cand[order[:n_starts]]
+    s_start = s_cand[order[:n_starts]]
+    step = 0.1
+    for _ in range(n_steps):
+        x_try = np.clip(x_start + rng.normal(size=x_start.shape) * step * span, lower, upper)
+        s_try = score(x_try)
+        better = s_try > s_start
+        x_start[better] = x_try[better]
+        s_start[better] = s_try[better]
+        step *= 0.5
+
+    if q == 1:
+        return x_start[[np.argmax(s_start)]]
+
+    # Pool the refined starts with the best of the remaining candidates
+    x_pool = np.vstack((x_start, x_cand[order[n_starts:max(n_pool, q)]]))
+
+    # Greedily build the batch from the joint posterior of the pool
+    mu, cov = model.predict(x_pool, return_cov=True)
+    mu = sign * mu.reshape(len(x_pool), -1)[:, 0]
+    cov = cov.reshape(len(x_pool), len(x_pool), -1)[:, :, 0].copy()
+    chosen = []
+    for _ in range(q):
+        sigma = np.sqrt(np.clip(np.diag(cov), 0, None))
+        s = f(mu, sigma, y_best, **kwargs)
+        s[chosen] = -np.inf
+        k = int(np.argmax(s))
+        chosen.append(k)
+
+        # Condition on the believed observation at k
+        y_best = max(y_best, mu[k])
+        if cov[k, k] > 0:
+            cov -= np.outer(cov[:, k], cov[:, k]) / cov[k, k]
+
+    return x_pool[chosen]
+
+
+def benchmark(
+        dims: tuple = (2, 3, 4, 5, 6),
+        n_train: int = 30,
+        q: int = 4,
+        repeat: int = 5,
+):
+    """
+    Print the time to propose one point and a batch of q points.
+    :param dims: The dimensions of the search spaces
+    :param n_train: The number of training points of each GP
+    :param q: The batch size
+    :param repeat: The number of timed runs
+    :return: None
+    """
+    from sklearn.gaussian_process import GaussianProcessRegressor
+    rng = np.random.default_rng(0)
+    for d in dims:
+        model = GaussianProcessRegressor()
+        model.fit(rng.random((n_train, d)), rng.random(n_train))
+        bounds = np.array([[0, 1]] * d)
+        for n, acq in [(1, 'ei'), (q, 'ei'), (q, 'ucb')]:
+            times = []
+            for i in range(repeat):
+                start = time.perf_counter()
+                propose(model, bounds, q=n, acquisition=acq, seed=i)
+                times.append(time.perf_counter() - start)
+            print(f'd={d} q={n} {acq:>3}: {min(times) * 1e3:6.1f} ms')
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,155 @@
+from concurrent.futures import ProcessPoolExecutor
+from numpy.lib.format import open_memmap
+from typing import Optional, Union
+import numpy as np
+import os
+
+# Random GP surfaces. Each surface draws from its own random generator, so
+# results don't depend on the order (or process) in which surfaces are made.
+
+
+def make_surface(
+        rng: Union[np.random.Generator, np.random.RandomState],
+        n_train: int = 10,
+        dim: int = 2,
+        n_sample: int = 100,
+        chunk: int = 65536,
+) -> tuple:
+    """
+    Fit a GP to random training data and sample it on a regular grid.
+    :param rng: The random generator. np.random.RandomState is also accepted,
+    so that surfaces from legacy seeds can be reproduced.
+    :param n_train: The number of training points
+    :param dim: The dimension of the domain
+    :param n_sample: The number of grid points along each dimension
+    :param chunk: The number of grid points predicted at a time
+    :return: (x_train, y_train, gp, z), where z has shape (n_sample,) * dim
+    """
+
+    # Create noisy training data and fit GP
+    from sklearn.gaussian_process import GaussianProcessRegressor
+    x_train = rng.random((n_train, dim))
+    y_train = rng.random((n_train, 1))
+    gp = GaussianProcessRegressor()
+    gp.fit(x_train, y_train)
+
+    # Sample GP on the grid, in chunks to bound memory in higher dimensions.
+    # Only the coordinates of one chunk exist at a time. The points are in the
+    # order of np.meshgrid, whose default 'xy' indexing swaps the first two
+    # axes.
+    xi_test = np.linspace(0, 1, n_sample)
+    shape = (n_sample,) * dim
+    z = np.empty(n_sample ** dim)
+    for start in range(0, len(z), chunk):
+        stop = min(start + chunk, len(z))
+        index = np.stack(np.unravel_index(np.arange(start, stop), shape), axis=1)
+        if dim > 1:
+            index[:, [0, 1]] = index[:, [1, 0]]
+        z[start:stop] = gp.predict(xi_test[index]).ravel()
+
+    return x_train, y_train, gp, z.reshape(shape)
+
+
+def _write_surface(
+        path: str,
+        i: int,
+        seed: np.random.SeedSequence,
+        n_train: int,
+        dim: int,
+        n_sample: int,
+) -> tuple:
+    """
+    Make one surface and write it into its slot of the stacked array. Executed
+    in a worker process.
+    :return: (x_train, y_train)
+    """
+    x_train, y_train, _, z = make_surface(
+        np.random.default_rng(seed),
+        n_train=n_train,
+        dim=dim,
+        n_sample=n_sample,
+    )
+    out = open_memmap(path, mode='r+')
+    out[i] = z
+    out.flush()
+    return x_train, y_train
+
+
+def generate(
+        path: str,
+        n_surfaces: int,
+        n_train: int = 10,
+        dim: int = 2,
+        n_sample: int = 100,
+        seed: int = 0,
+        n_jobs: Optional[int] = None,
+) -> np.memmap:
+    """
+    Generate many independent surfaces in a process pool. The surfaces are
+    stacked in a .npy file of shape (n_surfaces,) + (n_sample,) * dim, and the
+    training data is saved next to it as <name>_train.npz.
+    :param path: The .npy file to write
+    :param n_surfaces: The number of surfaces
+    :param n_train: The number of training points per surface
+    :param dim: The dimension of the domain
+    :param n_sample: The number of grid points along each dimension
+    :param seed: The root seed. Surface i always gets the same child seed.
+    :param n_jobs: The number of worker processes. If None, one per CPU.
+    :return: The stacked surfaces, as a read-only memmap
+    """
+
+    # Create the output file, which the workers fill in
+    out = open_memmap(
+        path,
+        mode='w+',
+        dtype=np.float32,
+        shape=(n_surfaces,) + (n_sample,) * dim,
+    )
+    del out
+
+    # One independent child seed per surface
+    seeds = np.random.SeedSequence(seed).spawn(n_surfaces)
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        train = list(pool.map(
+            _write_surface,
+            [path] * n_surfaces,
+            range(n_surfaces),
+            seeds,
+            [n_train] * n_surfaces,
+            [dim] * n_surfaces,
+            [n_sample] * n_surfaces,
+        ))
+
+    # Save the training data
+    np.savez(
+        f'{os.path.splitext(path)[0]}_train.npz',
+        x=np.stack([t[0] for t in train]),
+        y=np.stack([t[1] for t in train]),
+    )
+
+    return open_memmap(path, mode='r')
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+    parser = argparse.ArgumentParser(description='Generate random GP surfaces.')
+    parser.add_argument('path')
+    parser.add_argument('-n', '--n-surfaces', type=int, default=100)
+    parser.add_argument('--n-train', type=int, default=10)
+    parser.add_argument('--dim', type=int, default=2)
+    parser.add_argument('--n-sample', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-j', '--n-jobs', type=int, default=None)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    surfaces = generate(
+        args.path,
+        args.n_surfaces,
+        n_train=args.n_train,
+        dim=args.dim,
+        n_sample=args.n_sample,
+        seed=args.seed,
+        n_jobs=args.n_jobs,
+    )
+    print(f'Wrote {surfaces.shape} to {args.path} in {time.perf_counter() - start:.1f} s')
@@ -1,28 +1,33 @@
-from sklearn.gaussian_process import GaussianProcessRegressor
+from generate import make_surface
+from typing import Optional
 import matplotlib.pyplot as plt
 import numpy as np
 import os
 
-# Create two surfaces to compare grid and optimization sampling.
+from common.contour import surface
+from common.output import Sink, FileSink
+from common.style import format_axes
 
+# Create two surfaces to compare grid and optimization sampling.
 
-def run():
 
-    # Create noisy training data and fit GP
-    n_train = 10
-    np.random.seed(7)
-    x_train = np.random.rand(n_train, 2)
-    y_train = np.random.rand(n_train, 1)
-    gp = GaussianProcessRegressor()
-    gp.fit(x_train, y_train)
+def run(sink: Optional[Sink] = None):
+    """
+    Plot a GP surface fit to random training data.
+    :param sink: Where the figure is written. If None, it is saved to file.
+    :return: The fitted GaussianProcessRegressor
+    """
 
-    # Sample GP for surface
+    # Create noisy training data, fit GP and sample it. The legacy seed keeps
+    # the published surface.
     n_sample = 100
+    _, _, gp, y_test = make_surface(
+        np.random.RandomState(7),
+        n_train=10,
+        n_sample=n_sample,
+    )
     xi_test = np.linspace(0, 1, n_sample)
     xi, xj = np.meshgrid(xi_test, xi_test)
-    x_test = np.vstack((xi.flatten(), xj.flatten())).T
-    y_test = gp.predict(x_test)
-    y_test = y_test.reshape(n_sample, n_sample)
 
     # Create the figure objects
     figure: plt.Figure = plt.figure(
@@ -33,46 +38,41 @@ def run():
     ax_1: plt.Axes = figure.add_subplot(1, 2, 2)
 
     # Formatting constants
-    data = (xi, xj, y_test)
-    kwargs = {
-        'cmap': 'plasma',
-        'levels': 10,
-    }
+    cmap = 'plasma'
 
-    # Plot the surfaces
+    # Compute the contours once, then plot the surfaces
+    contours = surface(xi, xj, y_test, levels=10)
     for ax in [ax_0, ax_1]:
-        ax.contour(
-            *data,
-            **kwargs,
+        contours.contour(
+            ax,
+            cmap,
             linewidths=1.5,
             linestyles=":",
         )
-        ax.contour(
-            *data,
-            **kwargs,
+        contours.contour(
+            ax,
+            cmap,
             linewidths=1.5,
             alpha=0.5,
         )
-        ax.contourf(
-            *data,
-            **kwargs,
+        contours.contourf(
+            ax,
+            cmap,
             alpha=0.2,
         )
 
     # Format
+    format_axes([ax_0, ax_1], ticks=False)
     for ax in [ax_0, ax_1]:
         ax.set_aspect('equal')
-        for pos in ['left', 'right', 'top', 'bottom']:
-            ax.spines[pos].set_visible(False)
-        ax.set_xticks([])
-        ax.set_yticks([])
         ax.set_xlim(0, 1)
         ax.set_ylim(0, 1)
 
     # Save
     name = os.path.basename(__file__).split('.')[0]
-    figure.savefig(f'{name}.png')
-    figure.savefig(f'{name}.svg')
+    (sink or FileSink()).write(figure, name, ['png', 'svg'])
+
+    return gp
 
 
 if __name__ == '__main__':
@@ -0,0 +1,104 @@
+import urllib.request
+import urllib.error
+import subprocess
+import socket
+import json
+import time
+import sys
+import os
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _get(url: str) -> int:
+    try:
+        with urllib.request.urlopen(url, timeout=120) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def test_steel_then_ordered_apareto_front():
+    # The server is started as it is deployed. Loading steel/ first must not
+    # shadow the steel package that the Pareto figure imports.
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(root, 'common', 'scripts.py'), 'common/server.py', '--port', str(port)],
+        cwd=root,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        url = f'http://127.0.0.1:{port}'
+        for _ in range(100):
+            try:
+                _get(url + '/')
+                break
+            except OSError:
+                time.sleep(0.1)
+        assert _get(url + '/steel.png?dpi=20') == 200
+        assert _get(url + '/ordered_apareto_front.png?dpi=20') == 200
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def test_dependencies():
+    # Every module of the repository that a figure imports must be in its
+    # dependency list, or edits to it don't invalidate the cache. Each figure
+    # is loaded in a fresh interpreter, so that its modules can be told apart.
+    sys.path.insert(0, root)
+    from common.server import figures
+    code = (
+        'import json, sys, os\n'
+        'from common import server\n'
+        'for path in sys.argv[1:]:\n'
+        '    server._load(path)\n'
+        'print(json.dumps([getattr(m, "__file__", None) or "" for m in list(sys.modules.values())]))\n'
+    )
+    for name, (_, paths) in figures.items():
+        sources = [p for p in paths if p.endswith('.py')]
+        result = subprocess.run(
+            [sys.executable, '-c', code, *sources],
+            cwd=root,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        files = {
+            os.path.relpath(f, root) for f in json.loads(result.stdout)
+            if f.startswith(root + os.sep) and os.path.basename(f) != '__init__.py'
+        }
+        assert files - {'common/server.py', 'common/scripts.py'} <= set(sources), name
+
+
+def test_reload(tmp_path):
+    # A figure is rendered with the new code after a module it imports changes
+    sys.path.insert(0, root)
+    from common import server
+    helper = tmp_path / 'helper.py'
+    script = tmp_path / 'figure.py'
+    helper.write_text('value = 1\n')
+    script.write_text('import helper\n\n\ndef render(fmt, dpi):\n    return str(helper.value).encode()\n')
+    paths = [str(script), str(helper)]
+    server.figures['_test_reload'] = (lambda fmt, dpi: server._load(str(script)).render(fmt, dpi), paths)
+    try:
+        figure_server = server.FigureServer()
+        assert figure_server.get('_test_reload') == (b'1', False)
+        assert figure_server.get('_test_reload') == (b'1', True)
+        helper.write_text('value = 20\n')
+        assert figure_server.get('_test_reload') == (b'20', False)
+    finally:
+        del server.figures['_test_reload']
+        for path in paths:
+            server._modules.pop(path, None)
+            server._code_hashes.pop(path, None)
+        sys.modules.pop('helper', None)
+        sys.path.remove(str(tmp_path))
@@ -0,0 +1,175 @@
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple, Union
+import pandas as pd
+import numpy as np
+import os
+
+# This date originates from BP's Statistical Review of World Energy
+# https://www.bp.com/en/global/corporate/energy-economics/statistical-review-of-world-energy.html
+
+# Data manually summarised from .xlsx here:
+# https://docs.google.com/spreadsheets/d/1nAkRHbUmsCjcayQHBPRB282LRbyMtHEC6xL2YR7IMQY
+
+# Convert to power
+mtoeyr_to_twhyr = 11.63
+twhyr_to_twhh = 1 / (24 * 365)
+
+# Source groups, declared once: group -> members. Members may be sources or
+# other groups.
+source_groups = {
+    'Total': ['Oil', 'Gas', 'Coal', 'Nuclear', 'Hydro', 'Solar', 'Wind', 'Other'],
+    'Fossil': ['Oil', 'Gas', 'Coal'],
+    'Nonfossil': ['Wind', 'Solar', 'Other', 'Hydro', 'Nuclear'],
+    'Renew': ['Wind', 'Solar', 'Other'],
+    'NuclearHydro': ['Hydro', 'Nuclear'],
+}
+energy_names = source_groups['Total']
+fossil_names = source_groups['Fossil']
+renew_names = source_groups['Renew']
+other_names = source_groups['NuclearHydro']
+nonfossil_names = source_groups['Nonfossil']
+
+# Column transforms, computed from the column in TW
+transforms = ('tw', 'diff', 'pct_change', 'fraction')
+
+
+class EnergyDataset:
+    """
+    Energy consumption by source, in TW, with the group columns and derived
+    tables that the figures share. Columns are computed on first use, one at
+    a time: sources are converted to TW, groups are summed from their
+    members, and each result is kept. Ask for the columns a figure needs with
+    data[names] or the diff, pct_change and fraction methods. Treat every
+    table as read-only; copy before modifying.
+    """
+    def __init__(
+            self,
+            df_mtoeyr: pd.DataFrame,
+            groups: Optional[Dict[str, List[str]]] = None,
+    ):
+        """
+        :param df_mtoeyr: Consumption in Mtoe/yr, indexed by integer year with
+        one column per source.
+        :param groups: Group name -> members. If None, source_groups.
+        """
+        self.df_mtoeyr = df_mtoeyr
+        self.groups = source_groups if groups is None else groups
+        self.names = list(df_mtoeyr.columns) + [g for g in self.groups if g not in df_mtoeyr]
+        self.index = df_mtoeyr.index
+
+        # Computed columns: (transform, name) -> Series
+        self._columns: Dict[Tuple[str, str], pd.Series] = {}
+
+    def column(self, name: str, transform: str = 'tw') -> pd.Series:
+        """
+        One column, computed on first use.
+        :param name: A source or group
+        :param transform: 'tw' (consumption), 'diff' (annual change, TW),
+        'pct_change' (fractional annual change, NaN when growing from zero)
+        or 'fraction' (fraction of the total)
+        :return: The column
+        """
+        key = (transform, name)
+        if key in self._columns:
+            return self._columns[key]
+
+        if transform == 'tw':
+            if name in self.df_mtoeyr:
+                # Convert to power
+                s = self.df_mtoeyr[name] * (mtoeyr_to_twhyr * twhyr_to_twhh)
+            elif name in self.groups:
+                s = pd.concat([self.column(m) for m in self.groups[name]], axis=1).sum(axis=1)
+            else:
+                raise KeyError(f'Unknown source or group: {name}')
+        elif transform == 'diff':
+            s = self.column(name).diff()
+        elif transform == 'pct_change':
+            s = self.column(name).pct_change().replace(np.inf, np.nan)
+        elif transform == 'fraction':
+            s = self.column(name) / self.column('Total')
+        else:
+            raise ValueError(f'Unknown transform: {transform}. Choose from {transforms}.')
+
+        s = s.rename(name)
+        self._columns[key] = s
+        return s
+
+    def frame(
+            self,
+            names: Optional[List[str]] = None,
+            transform: str = 'tw',
+    ) -> pd.DataFrame:
+        """
+        :param names: Sources and groups. If None, all of them.
+        :param transform: See column
+        :return: DataFrame with one column per name
+        """
+        names = self.names if names is None else names
+        return pd.concat([self.column(n, transform) for n in names], axis=1)
+
+    def __getitem__(self, names: Union[str, List[str]]) -> Union[pd.Series, pd.DataFrame]:
+        if isinstance(names, str):
+            return self.column(names)
+        return self.frame(list(names))
+
+    @classmethod
+    def read_csv(cls, path: str = 'data.csv') -> 'EnergyDataset':
+        """
+        Read the summarised csv, which has one row per source and one column
+        per year.
+        :param path: The csv file
+        :return: EnergyDataset
+        """
+        df_mtoeyr = pd.read_csv(path).set_index('Year').T
+
+        # Make index an integer
+        df_mtoeyr.index = df_mtoeyr.index.astype('int64')
+        return cls(df_mtoeyr)
+
+    @cached_property
+    def tw(self) -> pd.DataFrame:
+        """
+        Every source and group, TW.
+        """
+        return self.frame()
+
+    def diff(self, names: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Annual change, TW.
+        :param names: Sources and groups. If None, all of them.
+        """
+        return self.frame(names, 'diff')
+
+    def pct_change(self, names: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Fractional annual change. Growth from zero is NaN.
+        :param names: Sources and groups. If None, all of them.
+        """
+        return self.frame(names, 'pct_change')
+
+    def fraction(self, names: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Fraction of the total consumption.
+        :param names: Sources and groups. If None, all of them.
+        """
+        return self.frame(names, 'fraction')
+
+
+# Loaded datasets: absolute path -> (mtime, dataset)
+_datasets: Dict[str, Tuple[float, EnergyDataset]] = {}
+
+
+def load_dataset(path: str = 'data.csv') -> EnergyDataset:
+    """
+    Load a dataset, reusing the one already in memory unless the file has
+    been modified since.
+    :param path: The csv file
+    :return: EnergyDataset
+    """
+    key = os.path.abspath(path)
+    mtime = os.path.getmtime(key)
+    cached = _datasets.get(key)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, EnergyDataset.read_csv(key))
+        _datasets[key] = cached
+    return cached[1]
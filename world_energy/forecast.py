@@ -0,0 +1,145 @@
+from typing import Dict, Optional, Tuple
+import pandas as pd
+import numpy as np
+import hashlib
+
+# Trend projections of energy consumption. Each model is fit to every source
+# at once, with the sources as columns of one array. Fits are cached on a hash
+# of the input data, so repeated scenario runs only pay for the projection.
+
+models = ('linear', 'exponential', 'logistic')
+
+# Carrying capacities searched by the logistic fit, as multiples of the
+# largest observed value
+logistic_capacity = np.geomspace(1.05, 20, 64)
+
+# Fits: key -> (model, t0, parameters of shape n_params x n_sources)
+_fits: Dict[str, Tuple[str, int, np.ndarray]] = {}
+
+
+def _key(df: pd.DataFrame, model: str, since: Optional[int]) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.ascontiguousarray(df.to_numpy(dtype=float)).tobytes())
+    h.update(np.asarray(df.index, dtype=np.int64).tobytes())
+    h.update(repr((list(df.columns), model, since)).encode())
+    return h.hexdigest()
+
+
+def _fit_logistic(t: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    Fit y = K / (1 + exp(-(a + b t))) to every column. For each candidate K
+    the logit is linear in t, so all candidates and columns are fit together
+    and the K with the least squared error (in y) is kept per column.
+    :param t: The times, of length n
+    :param y: The values, of shape n x k. Must be positive.
+    :return: Parameters (K, a, b), of shape 3 x k
+    """
+    n, k = y.shape
+    capacity = logistic_capacity[:, None] * y.max(axis=0)[None, :]  # g x k
+    ratio = y[None, :, :] / capacity[:, None, :]  # g x n x k
+    ratio = np.clip(ratio, 1e-12, 1 - 1e-12)
+    z = np.log(ratio / (1 - ratio))
+
+    # One linear fit of every (candidate, column) pair
+    b, a = np.polyfit(t, z.transpose(1, 0, 2).reshape(n, -1), 1)
+    a = a.reshape(-1, k)
+    b = b.reshape(-1, k)
+
+    # Keep the best candidate of each column
+    pred = capacity[:, None, :] / (1 + np.exp(-(a[:, None, :] + b[:, None, :] * t[None, :, None])))
+    sse = ((pred - y[None, :, :]) ** 2).sum(axis=1)
+    best = np.argmin(sse, axis=0)
+    cols = np.arange(k)
+    return np.vstack((capacity[best, cols], a[best, cols], b[best, cols]))
+
+
+def fit(
+        df: pd.DataFrame,
+        model: str = 'linear',
+        since: Optional[int] = 2000,
+) -> Tuple[int, np.ndarray]:
+    """
+    Fit a trend model to every column of a table of consumption by year.
+    :param df: Consumption indexed by year, one column per source
+    :param model: 'linear', 'exponential' or 'logistic'
+    :param since: Only fit years from this one onwards. If None, all years.
+    :return: (t0, parameters). Times are measured in years from t0.
+    """
+    if model not in models:
+        raise ValueError(f'Unknown model: {model}. Choose from {models}.')
+    key = _key(df, model, since)
+    if key in _fits:
+        return _fits[key][1:]
+
+    d = df if since is None else df[df.index >= since]
+    t0 = int(d.index[0])
+    t = np.asarray(d.index, dtype=float) - t0
+    y = d.to_numpy(dtype=float)
+    tiny = np.finfo(float).tiny
+
+    if model == 'linear':
+        params = np.polyfit(t, y, 1)
+    elif model == 'exponential':
+        params = np.polyfit(t, np.log(np.clip(y, tiny, None)), 1)
+    else:
+        params = _fit_logistic(t, np.clip(y, tiny, None))
+
+    _fits[key] = (model, t0, params)
+    return t0, params
+
+
+def evaluate(
+        model: str,
+        t0: int,
+        params: np.ndarray,
+        years: np.ndarray,
+) -> np.ndarray:
+    """
+    Evaluate fitted models.
+    :param model: The model
+    :param t0: The reference year of the fit
+    :param params: The parameters returned by fit
+    :param years: The years to evaluate, of length m
+    :return: An array of shape m x n_sources
+    """
+    t = np.asarray(years, dtype=float)[:, None] - t0
+    if model == 'linear':
+        return params[0] * t + params[1]
+    if model == 'exponential':
+        return np.exp(params[0] * t + params[1])
+    capacity, a, b = params
+    return capacity / (1 + np.exp(-(a + b * t)))
+
+
+def project(
+        df: pd.DataFrame,
+        model: str = 'linear',
+        horizon: int = 2050,
+        since: Optional[int] = 2000,
+        anchor: bool = True,
+) -> pd.DataFrame:
+    """
+    Project every column of a table of consumption by year.
+    :param df: Consumption indexed by year, one column per source
+    :param model: 'linear', 'exponential' or 'logistic'
+    :param horizon: The last year of the projection
+    :param since: Only fit years from this one onwards. If None, all years.
+    :param anchor: Scale each projection so that it starts at the last
+    observed value, making the projection continuous with the history.
+    :return: The projection, indexed by year from the last observed year to
+    horizon, with the same columns as df
+    """
+    t0, params = fit(df, model, since)
+    last = int(df.index[-1])
+    years = np.arange(last, horizon + 1)
+    y = evaluate(model, t0, params, years)
+
+    if anchor:
+        observed = df.iloc[-1].to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scale = np.where(y[0] != 0, observed / y[0], 1)
+        y = y * scale
+
+    # Consumption can't be negative
+    y = np.clip(y, 0, None)
+    return pd.DataFrame(y, index=pd.Index(years, name=df.index.name), columns=df.columns)
@@ -0,0 +1,292 @@
+from dataset import EnergyDataset, energy_names
+from typing import Dict, Iterable, List, Optional, Union
+import pandas as pd
+import numpy as np
+import argparse
+import time
+import os
+
+# Ingestion of the full BP Statistical Review of World Energy workbook. Each
+# consumption sheet holds one source, with one row per country (and region
+# total) and one column per year. The workbook is parsed once into a tidy
+# columnar store of (country, year, source, value) rows, with countries and
+# sources stored as integer codes, and saved as .npz. Rows are sorted by a
+# composite (country, year, source) key, so lookups and per-country slices
+# are binary searches and aggregates are bincounts over compact arrays.
+
+# Sheet name -> source, for the consumption sheets in Mtoe
+sheets = {
+    'Oil Consumption - Mtoe': 'Oil',
+    'Gas Consumption - Mtoe': 'Gas',
+    'Coal Consumption - Mtoe': 'Coal',
+    'Nuclear Consumption - Mtoe': 'Nuclear',
+    'Hydro Consumption - Mtoe': 'Hydro',
+    'Solar Consumption - Mtoe': 'Solar',
+    'Wind Consumption - Mtoe': 'Wind',
+    'Geo Biomass Other - Mtoe': 'Other',
+}
+
+# The row holding the world total of every sheet
+world = 'Total World'
+
+
+def _header_row(raw: pd.DataFrame, min_years: int = 5) -> int:
+    """
+    Find the header row of a sheet: the first row with at least min_years
+    cells that are years.
+    :param raw: The sheet, read without a header
+    :param min_years: The number of year cells needed
+    :return: The row position
+    """
+    values = raw.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    is_year = (values >= 1900) & (values <= 2100) & (values == np.round(values))
+    rows = np.flatnonzero(is_year.sum(axis=1) >= min_years)
+    if not len(rows):
+        raise ValueError('No header row of years found.')
+    return int(rows[0])
+
+
+def tidy_sheet(raw: pd.DataFrame, source: str) -> pd.DataFrame:
+    """
+    Convert one sheet to tidy rows. Title rows above the header, growth-rate
+    and share columns after the years, blank rows, footnotes and cells
+    without a number (e.g. 'n/a', '-') are dropped.
+    :param raw: The sheet, read without a header
+    :param source: The source that the sheet holds
+    :return: DataFrame with columns country, year, source, value
+    """
+    header = _header_row(raw)
+    years = pd.to_numeric(raw.iloc[header], errors='coerce')
+    year_cols = [i for i, y in enumerate(years) if 1900 <= y <= 2100]
+
+    body = raw.iloc[header + 1:]
+    countries = body.iloc[:, 0].fillna('').astype(str).str.strip()
+    values = body.iloc[:, year_cols].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+
+    # Long format, keeping numeric cells of named rows
+    n_rows, n_years = values.shape
+    country = np.repeat(countries.to_numpy(dtype=object), n_years)
+    year = np.tile(years.iloc[year_cols].to_numpy(dtype=np.int16), n_rows)
+    value = values.ravel()
+    keep = ~np.isnan(value) & (country != '')
+    return pd.DataFrame({
+        'country': country[keep],
+        'year': year[keep],
+        'source': source,
+        'value': value[keep],
+    })
+
+
+class EnergyStore:
+    """
+    Consumption by country, year and source, as sorted columnar arrays.
+    Countries and sources are integer codes into self.countries and
+    self.sources.
+    """
+    def __init__(
+            self,
+            country: np.ndarray,
+            year: np.ndarray,
+            source: np.ndarray,
+            value: np.ndarray,
+            countries: List[str],
+            sources: List[str],
+    ):
+        """
+        :param country: Country codes
+        :param year: Years
+        :param source: Source codes
+        :param value: Consumption, Mtoe/yr
+        :param countries: Country names, by code
+        :param sources: Source names, by code
+        """
+        self.countries = np.asarray(countries, dtype=str)
+        self.sources = np.asarray(sources, dtype=str)
+        self.year_min = int(np.min(year)) if len(year) else 0
+        self.n_years = int(np.max(year)) - self.year_min + 1 if len(year) else 0
+
+        # Sort by the composite key
+        key = self._key(country, year, source)
+        order = np.argsort(key, kind='stable')
+        self.key = key[order]
+        self.country = np.asarray(country, dtype=np.int16)[order]
+        self.year = np.asarray(year, dtype=np.int16)[order]
+        self.source = np.asarray(source, dtype=np.int8)[order]
+        self.value = np.asarray(value, dtype=np.float32)[order]
+
+        self._country_codes = {c: i for i, c in enumerate(self.countries)}
+        self._source_codes = {s: i for i, s in enumerate(self.sources)}
+
+    def __len__(self) -> int:
+        return len(self.value)
+
+    def _key(self, country, year, source) -> np.ndarray:
+        country = np.asarray(country, dtype=np.int64)
+        year = np.asarray(year, dtype=np.int64) - self.year_min
+        source = np.asarray(source, dtype=np.int64)
+        return (country * self.n_years + year) * len(self.sources) + source
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'EnergyStore':
+        """
+        :param df: Tidy rows with columns country, year, source, value
+        :return: EnergyStore
+        """
+        country = pd.Categorical(df['country'])
+        source = pd.Categorical(df['source'], categories=[
+            s for s in energy_names if s in set(df['source'])
+        ] + sorted(set(df['source']) - set(energy_names)))
+        return cls(
+            country.codes,
+            df['year'].to_numpy(),
+            source.codes,
+            df['value'].to_numpy(),
+            list(country.categories),
+            list(source.categories),
+        )
+
+    @classmethod
+    def read_excel(
+            cls,
+            path: str,
+            sheet_sources: Optional[Dict[str, str]] = None,
+    ) -> 'EnergyStore':
+        """
+        Parse the Statistical Review workbook. Needs openpyxl.
+        :param path: The .xlsx file
+        :param sheet_sources: Sheet name -> source. If None, sheets.
+        :return: EnergyStore
+        """
+        sheet_sources = sheets if sheet_sources is None else sheet_sources
+        raw = pd.read_excel(path, sheet_name=list(sheet_sources), header=None)
+        return cls.from_frame(pd.concat(
+            [tidy_sheet(raw[name], source) for name, source in sheet_sources.items()],
+            ignore_index=True,
+        ))
+
+    def save(self, path: str):
+        """
+        Save as .npz.
+        :param path: The file
+        """
+        np.savez(
+            path,
+            country=self.country,
+            year=self.year,
+            source=self.source,
+            value=self.value,
+            countries=self.countries,
+            sources=self.sources,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'EnergyStore':
+        """
+        Load a store saved by save.
+        :param path: The .npz file
+        :return: EnergyStore
+        """
+        with np.load(path) as f:
+            return cls(
+                f['country'],
+                f['year'],
+                f['source'],
+                f['value'],
+                list(f['countries']),
+                list(f['sources']),
+            )
+
+    def _codes(self, names: Union[str, Iterable[str]], codes: Dict[str, int], kind: str) -> np.ndarray:
+        names = [names] if isinstance(names, str) else list(names)
+        missing = [n for n in names if n not in codes]
+        if missing:
+            raise KeyError(f'Unknown {kind}: {", ".join(missing)}')
+        return np.array([codes[n] for n in names], dtype=np.int64)
+
+    def get(self, country: str, year: int, source: str) -> float:
+        """
+        Look up one value.
+        :param country: The country
+        :param year: The year
+        :param source: The source
+        :return: Consumption, Mtoe/yr, or NaN if there is none
+        """
+        c = self._codes(country, self._country_codes, 'country')[0]
+        s = self._codes(source, self._source_codes, 'source')[0]
+        if not 0 <= year - self.year_min < self.n_years:
+            return np.nan
+        k = self._key(c, year, s)
+        i = np.searchsorted(self.key, k)
+        return float(self.value[i]) if i < len(self.key) and self.key[i] == k else np.nan
+
+    def rows(self, countries: Union[str, Iterable[str]]) -> np.ndarray:
+        """
+        The positions of every row of some countries. Each country's rows are
+        one contiguous block.
+        :param countries: Country names
+        :return: Row positions
+        """
+        c = self._codes(countries, self._country_codes, 'country')
+        stride = self.n_years * len(self.sources)
+        starts = np.searchsorted(self.key, c * stride)
+        stops = np.searchsorted(self.key, (c + 1) * stride)
+        return np.concatenate([np.arange(a, b) for a, b in zip(starts, stops)] or [np.empty(0, int)])
+
+    def wide(self, countries: Union[str, Iterable[str]] = world) -> pd.DataFrame:
+        """
+        Consumption summed over countries, in the layout of the summarised
+        csv.
+        :param countries: Country (or region) names
+        :return: DataFrame in Mtoe/yr indexed by integer year, one column per
+        source. Years where no country has a value for a source are NaN.
+        """
+        i = self.rows(countries)
+        cell = (self.year[i].astype(np.int64) - self.year_min) * len(self.sources) + self.source[i]
+        size = self.n_years * len(self.sources)
+        total = np.bincount(cell, weights=self.value[i], minlength=size)
+        count = np.bincount(cell, minlength=size)
+        total = np.where(count > 0, total, np.nan).reshape(self.n_years, len(self.sources))
+
+        df = pd.DataFrame(
+            total,
+            index=pd.Index(np.arange(self.year_min, self.year_min + self.n_years), dtype='int64'),
+            columns=self.sources.tolist(),
+        )
+        return df.dropna(how='all')
+
+    def dataset(self, countries: Union[str, Iterable[str]] = world) -> EnergyDataset:
+        """
+        :param countries: Country (or region) names
+        :return: The EnergyDataset of the countries' summed consumption
+        """
+        return EnergyDataset(self.wide(countries)[energy_names].fillna(0))
+
+
+def load_store(path: str, cache: Optional[str] = None) -> EnergyStore:
+    """
+    Load the store of a workbook, parsing the workbook only if the cache is
+    missing or older than it.
+    :param path: The .xlsx file
+    :param cache: The .npz cache. If None, next to the workbook.
+    :return: EnergyStore
+    """
+    cache = os.path.splitext(path)[0] + '.npz' if cache is None else cache
+    if os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(path):
+        return EnergyStore.load(cache)
+    store = EnergyStore.read_excel(path)
+    store.save(cache)
+    return store
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Ingest the BP Statistical Review workbook.')
+    parser.add_argument('xlsx')
+    parser.add_argument('-o', '--output', default=None, help='the .npz store (default: next to the workbook)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = EnergyStore.read_excel(args.xlsx)
+    output = args.output or os.path.splitext(args.xlsx)[0] + '.npz'
+    store.save(output)
+    print(f'{len(store)} rows, {len(store.countries)} countries, {len(store.sources)} sources '
+          f'in {time.perf_counter() - start:.1f} s -> {output}')
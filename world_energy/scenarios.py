@@ -0,0 +1,131 @@
+from dataset import EnergyDataset, energy_names, source_groups
+from typing import Dict, List, Optional
+import pandas as pd
+import numpy as np
+
+# Monte Carlo scenarios of future consumption. Each scenario draws a sequence
+# of historical years and applies those years' growth rates to every source
+# (so correlated years stay correlated across sources). Scenarios are
+# evaluated in chunks as arrays of shape (n_scenarios, n_sources, n_years),
+# summed into source groups, and accumulated into fixed histograms per group
+# and year, so memory doesn't grow with the number of scenarios.
+
+default_groups = {g: source_groups[g] for g in ('Total', 'Fossil', 'Nonfossil')}
+
+
+def _quantiles_from_counts(
+        counts: np.ndarray,
+        edges: np.ndarray,
+        q: np.ndarray,
+) -> np.ndarray:
+    """
+    Interpolate quantiles from histograms.
+    :param counts: Counts of shape cells x n_bins
+    :param edges: Log bin edges of shape cells x (n_bins + 1)
+    :param q: Quantiles in [0, 1], of length m
+    :return: Values of shape cells x m
+    """
+    cdf = np.cumsum(counts, axis=1)
+    target = q[None, :] * cdf[:, -1:]
+    cells = np.arange(len(counts))[:, None]
+
+    # First bin whose cumulative count reaches each target
+    b = (cdf[:, :, None] < target[:, None, :]).sum(axis=1)
+    b = np.minimum(b, counts.shape[1] - 1)
+
+    # Linear interpolation within the bin
+    below = np.where(b > 0, cdf[cells, b - 1], 0)
+    inside = np.maximum(counts[cells, b], 1)
+    frac = np.clip((target - below) / inside, 0, 1)
+    log_v = edges[cells, b] + frac * (edges[cells, b + 1] - edges[cells, b])
+    return np.exp(log_v)
+
+
+def simulate(
+        data: EnergyDataset,
+        n_scenarios: int = 10000,
+        horizon: int = 2050,
+        since: int = 2000,
+        quantiles: List[float] = (5, 25, 50, 75, 95),
+        groups: Optional[Dict[str, List[str]]] = None,
+        chunk: int = 10000,
+        n_bins: int = 4096,
+        seed: int = 0,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Simulate growth scenarios and return quantile bands per source group.
+    :param data: The dataset. Growth rates are taken from data.pct_change().
+    :param n_scenarios: The number of scenarios
+    :param horizon: The last projected year
+    :param since: Only sample growth rates from this year onwards
+    :param quantiles: The percentiles to report (0 to 100)
+    :param groups: Group name -> sources summed into the group. If None,
+    Total, Fossil and Nonfossil.
+    :param chunk: The number of scenarios evaluated at a time
+    :param n_bins: The number of histogram bins per group and year. Quantile
+    resolution is 1/n_bins of the log range of each year.
+    :param seed: Seed for the scenario draws
+    :return: Group name -> DataFrame indexed by year (from the last observed
+    year) with one column per percentile
+    """
+    groups = default_groups if groups is None else groups
+    sources = sorted({s for names in groups.values() for s in names}, key=energy_names.index)
+
+    # Historical growth rates, one row per year
+    pct_change = data.pct_change(sources)
+    rates = pct_change[pct_change.index >= since].dropna().to_numpy()
+    last = data[sources].iloc[-1].to_numpy(dtype=float)
+    start_year = int(data.index[-1])
+    years = np.arange(start_year, horizon + 1)
+    n_years = len(years)
+    n_steps = n_years - 1
+
+    # Group membership, n_groups x n_sources
+    g = np.array([[s in names for s in sources] for names in groups.values()], dtype=float)
+    n_groups = len(g)
+
+    # Exact bounds of every group and year, from the extreme rates of each source
+    t = np.arange(n_years)[None, :]
+    low = g @ (last[:, None] * (1 + rates.min(axis=0))[:, None] ** t)
+    high = g @ (last[:, None] * (1 + rates.max(axis=0))[:, None] ** t)
+    log_high = np.log(high) + 1e-9
+    log_low = np.log(np.maximum(low, high * 1e-9)) - 1e-9
+    width = (log_high - log_low) / n_bins
+
+    # Accumulate histograms in chunks
+    rng = np.random.default_rng(seed)
+    counts = np.zeros(n_groups * n_years * n_bins, dtype=np.int64)
+    cell = (np.arange(n_groups)[:, None] * n_years + np.arange(n_years)[None, :]) * n_bins
+    for start in range(0, n_scenarios, chunk):
+        n = min(chunk, n_scenarios - start)
+
+        # Growth factors of shape (n, n_sources, n_steps)
+        idx = rng.integers(0, len(rates), size=(n, n_steps))
+        growth = 1 + rates[idx].transpose(0, 2, 1)
+
+        # Trajectories of shape (n, n_sources, n_years)
+        traj = np.empty((n, len(sources), n_years))
+        traj[:, :, 0] = last
+        np.cumprod(growth, axis=2, out=traj[:, :, 1:])
+        traj[:, :, 1:] *= last[None, :, None]
+
+        # Sum into groups, (n, n_groups, n_years), and bin
+        v = np.einsum('gs,nsy->ngy', g, traj)
+        with np.errstate(divide='ignore'):
+            b = ((np.log(v) - log_low) / width).astype(np.int64)
+        np.clip(b, 0, n_bins - 1, out=b)
+        counts += np.bincount((cell[None] + b).ravel(), minlength=counts.size)
+
+    # Quantiles from the histograms
+    edges = log_low.reshape(-1, 1) + width.reshape(-1, 1) * np.arange(n_bins + 1)
+    q = np.asarray(quantiles, dtype=float) / 100
+    values = _quantiles_from_counts(counts.reshape(-1, n_bins), edges, q)
+    values = values.reshape(n_groups, n_years, len(q))
+
+    # The first year is observed, not simulated
+    values[:, 0, :] = (g @ last)[:, None]
+
+    return {
+        name: pd.DataFrame(values[i], index=pd.Index(years, name='Year'), columns=list(quantiles))
+        for i, name in enumerate(groups)
+    }
@@ -0,0 +1,114 @@
+from matplotlib.collections import PolyCollection, LineCollection
+from matplotlib.colors import to_rgba_array
+import matplotlib.pyplot as plt
+import matplotlib as mpl
+from typing import List, Optional, Tuple, Union
+import numpy as np
+
+
+def _runs(valid: np.ndarray) -> List[Tuple[int, int]]:
+    """
+    :param valid: A boolean array
+    :return: The (start, stop) of each run of True values
+    """
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], valid.astype(np.int8), [0]))))
+    return list(zip(edges[::2].tolist(), edges[1::2].tolist()))
+
+
+def stack(
+        axes: plt.Axes,
+        x: np.ndarray,
+        layers: np.ndarray,
+        colors: List[str],
+        alpha: Union[float, List[float]] = 1,
+        line_colors: Optional[List[str]] = None,
+        line_alpha: Union[float, List[float]] = 1,
+        linewidth: float = 0,
+        fill_linewidth: float = 0,
+        capstyle: Optional[str] = None,
+) -> Tuple[PolyCollection, Optional[LineCollection]]:
+    """
+    Draw stacked areas. The cumulative baselines of every layer are computed
+    at once, all fills are drawn as one collection and all upper edges as
+    another. A missing (NaN) value leaves a gap in its layer and in every
+    layer above it.
+    :param axes: The axes
+    :param x: The x values, of length n
+    :param layers: The layer values, of shape n_layers x n. The first layer
+    is at the bottom.
+    :param colors: The fill color of each layer
+    :param alpha: The fill alpha, for all layers or for each layer
+    :param line_colors: The color of each layer's upper edge. If None, the
+    fill colors are used.
+    :param line_alpha: The edge alpha, for all layers or for each layer
+    :param linewidth: The width of the upper edges. If 0, none are drawn.
+    :param fill_linewidth: The width of the outline of each fill, drawn in the
+    fill color (as fill_between(color=...) does).
+    :param capstyle: The edge cap style. If None, the rcParams default for
+    lines is used.
+    :return: (fills, edges)
+    """
+
+    x = np.asarray(x, dtype=float)
+    layers = np.asarray(layers, dtype=float)
+    n_layers, n = layers.shape
+
+    # Cumulative tops and bases of every layer. A NaN carries up to the
+    # layers above it, as it did when each layer was added onto the last.
+    tops = np.cumsum(layers, axis=0)
+    bases = np.vstack((np.zeros(n), tops[:-1]))
+
+    # Each polygon runs along the top, then back along the base. Where values
+    # are missing, each layer is split into runs of finite values and the gaps
+    # are left out, as fill_between and plot do.
+    if np.isfinite(tops).all():
+        runs = [[(0, n)]] * n_layers
+        xs = np.broadcast_to(np.concatenate((x, x[::-1])), (n_layers, 2 * n))
+        ys = np.hstack((tops, bases[:, ::-1]))
+        polygons = np.stack((xs, ys), axis=-1)
+        lines = np.stack((np.broadcast_to(x, (n_layers, n)), tops), axis=-1)
+    else:
+        runs = [_runs(np.isfinite(top) & np.isfinite(base)) for top, base in zip(tops, bases)]
+        polygons = [
+            np.column_stack((
+                np.concatenate((x[a:b], x[a:b][::-1])),
+                np.concatenate((top[a:b], base[a:b][::-1])),
+            ))
+            for top, base, layer_runs in zip(tops, bases, runs)
+            for a, b in layer_runs
+        ]
+        lines = [
+            np.column_stack((x[a:b], top[a:b]))
+            for top, layer_runs in zip(tops, runs)
+            for a, b in layer_runs
+        ]
+    counts = [len(r) for r in runs]
+
+    facecolors = np.repeat(to_rgba_array(colors, alpha), counts, axis=0)
+    fills = PolyCollection(
+        polygons,
+        facecolors=facecolors,
+        edgecolors=facecolors,
+        linewidths=fill_linewidth,
+    )
+    axes.add_collection(fills, autolim=False)
+
+    # Upper edges
+    edges = None
+    if linewidth:
+        edge_colors = to_rgba_array(colors if line_colors is None else line_colors, line_alpha)
+        edges = LineCollection(
+            lines,
+            colors=np.repeat(edge_colors, counts, axis=0),
+            linewidths=linewidth,
+            capstyle=capstyle or mpl.rcParams['lines.solid_capstyle'],
+            joinstyle=mpl.rcParams['lines.solid_joinstyle'],
+            zorder=2,
+        )
+        axes.add_collection(edges, autolim=False)
+
+    # Update the data limits
+    axes.update_datalim([(np.nanmin(x), 0), (np.nanmax(x), np.nanmax(tops))])
+    axes.autoscale_view()
+
+    return fills, edges
@@ -5,70 +5,88 @@ import matplotlib.pyplot as plt
 from matplotlib.path import Path
 import matplotlib.patches as patches
 from matplotlib import ticker
+from dataset import EnergyDataset, load_dataset, energy_names
+import forecast
+import ingest
+import scenarios
+from stacked import stack
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, List, Dict, Union
+import argparse
+import time
 import os
 
-# Configure display
-pd.set_option('display.max_columns', 100)
-pd.set_option('display.width', 1000)
+from common.output import Sink, FileSink, render as render_bytes
+from common.style import Style, format_axes
 
 # Default font
-mpl.rcParams['font.sans-serif'] = 'Roboto'
-mpl.rcParams['font.weight'] = 'medium'
-mpl.rcParams['axes.spines.right'] = False
-mpl.rcParams['axes.spines.top'] = False
+style = Style({
+    'font.sans-serif': 'Roboto',
+    'font.weight': 'medium',
+    'axes.spines.right': False,
+    'axes.spines.top': False,
+})
+
+
+def load_data(
+        workbook: Optional[str] = None,
+        countries: Union[str, List[str]] = ingest.world,
+) -> pd.DataFrame:
+    """
+    Load the consumption data.
+    :param workbook: The full Statistical Review .xlsx. If None, the global
+    data in data.csv.
+    :param countries: The countries (or regions) to sum, from the workbook
+    :return: DataFrame of consumption by source and summary columns, in TW
+    """
+    if workbook is None:
+        return load_dataset().tw.copy()
+    return ingest.load_store(workbook).dataset(countries).tw.copy()
+
+
+def load_predict(path: str = 'prediction.csv'):
 
+    # https://docs.google.com/spreadsheets/d/15jLVwE5MGdgwCSmu8vOpY693ceZHLoLydtpeMd1ABGY
 
-def load_data() -> pd.DataFrame:
-
-    # This date originates from BP's Statistical Review of World Energy
-    # https://www.bp.com/en/global/corporate/energy-economics/statistical-review-of-world-energy.html
-
-    # Data manually summarised from .xlsx here:
-    # https://docs.google.com/spreadsheets/d/1nAkRHbUmsCjcayQHBPRB282LRbyMtHEC6xL2YR7IMQY
-
-    # Read in raw data from csv
-    df_mtoeyr = pd.read_csv('data.csv').set_index('Year').T
-
-    # Make index an integer
-    df_mtoeyr.index = df_mtoeyr.index.astype('int64')
-
-    # Convert to power
-    mtoeyr_to_twhyr = 11.63
-    twhyr_to_twhh = 1 / (24 * 365)
-    conv = mtoeyr_to_twhyr * twhyr_to_twhh
-    df_tw = df_mtoeyr * conv
-
-    # Create a total column.
-    energy_names = ['Oil', 'Gas', 'Coal', 'Nuclear', 'Hydro', 'Solar', 'Wind', 'Other']
-    fossil_names = ['Oil', 'Gas', 'Coal']
-    renew_names  = ['Wind', 'Solar', 'Other']
-    other_names = ['Hydro', 'Nuclear']
-    nonfossil_names = ['Wind', 'Solar', 'Other', 'Hydro', 'Nuclear']
-
-    # Create summary colums
-    df_tw['Total'] = df_tw[energy_names].sum(axis=1)
-    df_tw['Fossil'] = df_tw[fossil_names].sum(axis=1)
-    df_tw['Nonfossil'] = df_tw[nonfossil_names].sum(axis=1)
-    df_tw['Renew'] = df_tw[renew_names].sum(axis=1)
-    df_tw['NuclearHydro'] = df_tw[other_names].sum(axis=1)
-
-    # Return as TW
-    return df_tw
-
+    df = pd.read_csv(path).set_index('Year')
+    return df
 
-def load_predict():
+def load_projection(
+        data: EnergyDataset,
+        projection: str = 'spreadsheet',
+        predict_path: str = 'prediction.csv',
+        horizon: int = 2050,
+) -> pd.DataFrame:
+    """
+    Project the Total, Fossil and Nonfossil consumption.
+    :param data: The dataset
+    :param projection: A forecast model ('linear', 'exponential' or
+    'logistic'), fit to each source separately, or 'spreadsheet' to use the
+    hand-made prediction csv.
+    :param predict_path: The prediction csv, used by 'spreadsheet'
+    :param horizon: The last year projected by the forecast models
+    :return: DataFrame indexed by year, starting at the last observed year
+    """
+    cols = ['Total', 'Fossil', 'Nonfossil']
 
-    # https://docs.google.com/spreadsheets/d/15jLVwE5MGdgwCSmu8vOpY693ceZHLoLydtpeMd1ABGY
+    # Scale the predict data so that it is inline with the history data
+    if projection == 'spreadsheet':
+        df_p = load_predict(predict_path)
+        df_p[cols] = df_p[cols] * (data[cols].iloc[-1] / df_p[cols].iloc[0])
+        return df_p
 
-    df = pd.read_csv('prediction.csv').set_index('Year')
-    return df
+    # Project each source, then sum the groups
+    df_s = forecast.project(data[energy_names], projection, horizon=horizon)
+    return pd.DataFrame({c: df_s[data.groups[c]].sum(axis=1) for c in cols})
 
-def proportion():
 
-    df = load_data()
+@style
+def proportion(
+        data: Optional[EnergyDataset] = None,
+        sink: Optional[Sink] = None,
+) -> plt.Figure:
 
-    # Calculate percent contributions
-    df_frac = df.div(df.Total, axis=0)
+    data = load_dataset() if data is None else data
 
     # Names and colors
     cats = {
@@ -83,38 +101,23 @@ def proportion():
 
     }
 
+    # Percent contributions
+    df_frac = data.fraction(list(cats))
+
     # Begin plotting
     figure: plt.Figure = plt.figure()
     axes: plt.Axes = figure.add_subplot(1, 1, 1)
 
-    # baseline
-    base = np.zeros(df_frac.shape[0])
-
-    for name, color in cats.items():
-
-        # Increase
-        new_base = base + df_frac[name]
-
-        # Fill
-        axes.fill_between(
-            df_frac.index,
-            base,
-            new_base,
-            color=color,
-        )
-
-        # White line
-        axes.plot(
-            df_frac.index,
-            new_base,
-            color='white',
-            linewidth=0.5,
-        )
-
-
-
-        # Update
-        base = new_base
+    # Stacked fractions, with a white line on top of each
+    stack(
+        axes,
+        df_frac.index,
+        df_frac[list(cats)].to_numpy().T,
+        colors=list(cats.values()),
+        line_colors=['white'] * len(cats),
+        linewidth=0.5,
+        fill_linewidth=1,
+    )
 
     # Formatting
 
@@ -122,26 +125,27 @@ def proportion():
     axes.set_ylabel('Source of energy consumed')
     axes.set_yticks([])
 
-    # get rid of the frame
-    for spine in axes.spines.values():
-        spine.set_visible(False)
+    # Get rid of the frame and make the ticks white
+    format_axes(axes, length=10, color='white')
 
     # Bounds
-    axes.set_xlim(min(df.index), max(df.index))
+    axes.set_xlim(min(df_frac.index), max(df_frac.index))
     axes.set_ylim(0, 1)
 
-    # Remove ticks
-    axes.tick_params(axis=u'both', which=u'both', length=10, color='white')
+    # Save
+    (sink or FileSink()).write(figure, 'proportion', ['png'])
 
-    # Plot
-    figure.savefig('proportion.png')
-    plt.show()
+    return figure
 
 
-def abs_difference():
+@style
+def abs_difference(
+        data: Optional[EnergyDataset] = None,
+        sink: Optional[Sink] = None,
+) -> plt.Figure:
 
-    df = load_data() / 1000
-    diff = df.diff()
+    data = load_dataset() if data is None else data
+    diff = data.diff(['Renew', 'Fossil', 'Total']) / 1000
 
     figure: plt.Figure = plt.figure(figsize=(8,3), dpi=600)
     axes: plt.Axes = figure.add_subplot()
@@ -165,12 +169,8 @@ def abs_difference():
     axes.set_xlim(2000, 2018.2)
     axes.set_ylabel('Annual change in global\nconsumption (GWh)', weight='medium')
 
-    # get rid of the frame
-    for spine in axes.spines.values():
-        spine.set_visible(False)
-
-    # Make ticks white
-    axes.tick_params(axis=u'both', which=u'both', length=10, color='white')
+    # Get rid of the frame and make the ticks white
+    format_axes(axes, length=10, color='white')
 
     # Make the grid
     axes.yaxis.set_minor_locator(ticker.MultipleLocator(2))
@@ -213,14 +213,18 @@ def abs_difference():
             verticalalignment='center',
         )
 
-    name = 'abs_difference.png'
-    figure.savefig(name)
-    os.system(f'open {name}')
+    (sink or FileSink()).write(figure, 'abs_difference', ['png'])
+
+    return figure
 
 
-def consumption():
+@style
+def consumption(
+        data: Optional[EnergyDataset] = None,
+        sink: Optional[Sink] = None,
+) -> plt.Figure:
 
-    df = load_data()
+    data = load_dataset() if data is None else data
 
     figure: plt.Figure = plt.figure(figsize=(8,4), dpi=600)
     axes: plt.Axes = figure.add_subplot()
@@ -230,6 +234,7 @@ def consumption():
         'Fossil': '#ff4a59',
         'Total': '#4d4d4d',
     }
+    df = data[list(sources)]
 
     for source, color in sources.items():
         axes.plot(
@@ -244,12 +249,8 @@ def consumption():
     axes.set_xlim(2000, 2018.2)
     axes.set_ylabel('Power consumption (TW)', weight='medium')
 
-    # get rid of the frame
-    for spine in axes.spines.values():
-        spine.set_visible(False)
-
-    # Make ticks white
-    axes.tick_params(axis=u'both', which=u'both', length=10, color='white')
+    # Get rid of the frame and make the ticks white
+    format_axes(axes, length=10, color='white')
 
     # Make the grid
     axes.yaxis.set_major_locator(ticker.MultipleLocator(5))
@@ -284,18 +285,22 @@ def consumption():
             verticalalignment='center',
         )
 
-    name = 'consumption.png'
-    figure.savefig(name)
-    os.system(f'open {name}')
+    (sink or FileSink()).write(figure, 'consumption', ['png'])
 
+    return figure
 
-def change():
 
-    df = load_data()
+@style
+def change(
+        data: Optional[EnergyDataset] = None,
+        sink: Optional[Sink] = None,
+) -> plt.Figure:
 
-    # Calculate percent change, diff.
-    df_e_per = df.pct_change().replace(np.inf, np.nan) * 100
-    df_e_diff = df.diff()
+    data = load_dataset() if data is None else data
+
+    # Percent change, diff.
+    df_e_per = data.pct_change(['Total']) * 100
+    df_e_diff = data.diff(['Total', 'Fossil', 'Renew'])
 
     # Calculate percent contribution of fossil, renew
     df_e_diff['Fossil_per'] = df_e_diff.Fossil / df_e_diff.Total
@@ -316,12 +321,8 @@ def change():
     axes.set_ylabel('Percent change, annual')
     axes.legend()
 
-    # get rid of the frame
-    for spine in axes.spines.values():
-        spine.set_visible(False)
-
-    # Make ticks white
-    axes.tick_params(axis=u'both', which=u'both',length=10, color='white')
+    # Get rid of the frame and make the ticks white
+    format_axes(axes, length=10, color='white')
 
     # Make the grid
     y_spacing_minor = 2
@@ -342,12 +343,18 @@ def change():
         which='major'
     )
 
-    plt.show()
+    (sink or FileSink()).write(figure, 'change', ['png'])
 
+    return figure
 
-def consumption_projected():
 
-    df = load_data()
+@style
+def consumption_projected(
+        data: Optional[EnergyDataset] = None,
+        sink: Optional[Sink] = None,
+) -> plt.Figure:
+
+    data = load_dataset() if data is None else data
 
     figure: plt.Figure = plt.figure(figsize=(8,4), dpi=600)
     axes: plt.Axes = figure.add_subplot()
@@ -357,47 +364,25 @@ def consumption_projected():
         'Renew': 'dodgerblue',
         'Fossil': '#ff4a59',
     }
-
-    # Make a rising base
-    base = np.zeros(df.shape[0])
-
-    for source, color in sources.items():
-
-        # Increase
-        new_base = base + df[source]
-
-        axes.plot(
-            df.index,
-            new_base,
-            label=source,
-            color=color,
-            linewidth=3,
-        )
-
-        axes.fill_between(
-            df.index,
-            base,
-            new_base,
-            color=color,
-            alpha=0.5,
-            linewidth=0,
-
-        )
-
-        # Update
-        base = new_base
+    df = data[list(sources)]
+
+    # Stack the sources
+    stack(
+        axes,
+        df.index,
+        df[list(sources)].to_numpy().T,
+        colors=list(sources.values()),
+        alpha=0.5,
+        linewidth=3,
+    )
 
     # Formatting
     axes.set_xlim(1965, 2050)
     axes.set_ylim(0, 30)
     axes.set_ylabel('Power consumption (TW)', weight='medium')
 
-    # get rid of the frame
-    for spine in axes.spines.values():
-        spine.set_visible(False)
-
-    # Make ticks white
-    axes.tick_params(axis=u'both', which=u'both', length=10, color='white')
+    # Get rid of the frame and make the ticks white
+    format_axes(axes, length=10, color='white')
 
     # Make the grid
     axes.yaxis.set_major_locator(ticker.MultipleLocator(5))
@@ -416,20 +401,34 @@ def consumption_projected():
         top=0.95,
     )
 
-    name = 'consumption_projected.svg'
-    figure.savefig(name)
-    os.system(f'open {name}')
-
-
-def fossil_nonfossil():
+    (sink or FileSink()).write(figure, 'consumption_projected', ['svg'])
+
+    return figure
+
+
+@style
+def fossil_nonfossil(
+        data: Optional[EnergyDataset] = None,
+        sink: Optional[Sink] = None,
+        projection: str = 'spreadsheet',
+        predict_path: str = 'prediction.csv',
+        n_scenarios: int = 0,
+        band: tuple = (5, 95),
+) -> plt.Figure:
+    """
+    :param projection: 'spreadsheet' for the published projection, or a
+    forecast model ('linear', 'exponential' or 'logistic'). The arrow and the
+    'Improvement needed' label are placed for the published projection.
+    :param n_scenarios: If nonzero, draw this many Monte Carlo scenarios and
+    shade the band between the band percentiles of Total and Nonfossil.
+    :param band: The (lower, upper) percentiles of the shaded band
+    """
 
     # Get data
-    df = load_data()
-    df_p = load_predict()
-
-    # Scale the predict data so that it is inline with the history data
-    for i in ['Total', 'Fossil', 'Nonfossil']:
-        df_p[i] = df_p[i].multiply(df[i].iloc[-1] / df_p[i].iloc[0])
+    data = load_dataset() if data is None else data
+    df = data[['Fossil', 'Nonfossil']]
+    df_p = load_projection(data, projection, predict_path)
+    bands = scenarios.simulate(data, n_scenarios, quantiles=band) if n_scenarios else None
 
     # Create figure
     figure: plt.Figure = plt.figure(figsize=(6,3), dpi=600)
@@ -448,35 +447,30 @@ def fossil_nonfossil():
         },
     }
 
-    # Make a rising base
-    base = np.zeros(df.shape[0])
-
-    for i, s in sources.items():
-
-        # Increase
-        new_base = base + df[s['id']]
-
-        axes.plot(
-            df.index,
-            new_base,
-            label=s['id'],
-            color=s['color'],
-            solid_capstyle='round',
-            linewidth=3,
-        )
-
-        axes.fill_between(
-            df.index,
-            base,
-            new_base,
-            color=s['color'],
-            alpha=s['alpha'],
-            linewidth=0,
-
-        )
+    # Stack the sources
+    stack(
+        axes,
+        df.index,
+        df[[s['id'] for s in sources.values()]].to_numpy().T,
+        colors=[s['color'] for s in sources.values()],
+        alpha=[s['alpha'] for s in sources.values()],
+        linewidth=3,
+        capstyle='round',
+    )
 
-        # Update
-        base = new_base
+    # Scenario bands
+    if bands is not None:
+        for s in sources.values():
+            group = 'Total' if s['id'] == 'Fossil' else s['id']
+            lower, upper = band
+            axes.fill_between(
+                bands[group].index,
+                bands[group][lower],
+                bands[group][upper],
+                color=s['color'],
+                alpha=s['alpha'] / 2,
+                linewidth=0,
+            )
 
     # Update forecast
     axes.plot(
@@ -611,10 +605,127 @@ def fossil_nonfossil():
     )
 
     # Save
-    name = 'fossil_nonfossil.png'
-    figure.savefig(name)
-    os.system(f'open {name}')
+    (sink or FileSink()).write(figure, 'fossil_nonfossil', ['png'])
+
+    return figure
+
+
+# Every figure, by name
+figures = {
+    'proportion': proportion,
+    'abs_difference': abs_difference,
+    'consumption': consumption,
+    'change': change,
+    'consumption_projected': consumption_projected,
+    'fossil_nonfossil': fossil_nonfossil,
+}
+
+def render(
+        name: str,
+        fmt: str = 'png',
+        dpi: Optional[float] = None,
+        path: str = 'data.csv',
+        **kwargs,
+) -> bytes:
+    """
+    Render one figure in memory.
+    :param name: The figure name
+    :param fmt: The format
+    :param dpi: The resolution. If None, the figure's own dpi is used.
+    :param path: The data csv
+    :param kwargs: Passed to the figure function
+    :return: The rendered figure
+    """
+    return render_bytes(figures[name], fmt, dpi, data=load_dataset(path), **kwargs)
+
+
+# The dataset shared by each worker process, set once by _init_worker
+_data: Optional[EnergyDataset] = None
+
+
+def _init_worker(data: EnergyDataset):
+    """
+    Store the dataset in a worker process and select a non-interactive backend.
+    :param data: The dataset
+    :return: None
+    """
+    global _data
+    _data = data
+    mpl.use('Agg')
+
+
+def _render(
+        name: str,
+        dpi: Optional[float],
+        formats: Optional[List[str]],
+) -> float:
+    """
+    Render one figure to file. Executed in a worker process.
+    :param name: The figure name
+    :param dpi: The resolution, or None for the figure's own
+    :param formats: The file extensions, or None for the figure's own
+    :return: The render time in seconds
+    """
+    start = time.perf_counter()
+    figure = figures[name](_data, sink=FileSink(formats=formats, dpi=dpi))
+    plt.close(figure)
+    return time.perf_counter() - start
+
+
+def render_all(
+        names: Optional[List[str]] = None,
+        dpi: Optional[float] = None,
+        formats: Optional[List[str]] = None,
+        n_jobs: Optional[int] = None,
+        path: str = 'data.csv',
+) -> Dict[str, float]:
+    """
+    Render figures concurrently in a process pool, from one loaded dataset.
+    :param names: The figures to render. If None, all are rendered.
+    :param dpi: Override the resolution of every figure
+    :param formats: Override the file formats of every figure
+    :param n_jobs: The number of worker processes. If None, one per figure,
+    up to one per CPU.
+    :param path: The data csv
+    :return: The render time of each figure, in seconds
+    """
+    names = list(figures) if names is None else names
+    data = load_dataset(path)
+    with ProcessPoolExecutor(
+            max_workers=n_jobs or min(len(names), os.cpu_count() or 1),
+            initializer=_init_worker,
+            initargs=(data,),
+    ) as pool:
+        times = pool.map(
+            _render,
+            names,
+            [dpi] * len(names),
+            [formats] * len(names),
+        )
+        return dict(zip(names, times))
 
 
 if __name__ == '__main__':
-    fossil_nonfossil()
\ No newline at end of file
+    # Configure display
+    pd.set_option('display.max_columns', 100)
+    pd.set_option('display.width', 1000)
+
+    parser = argparse.ArgumentParser(description='Render the world energy figures.')
+    parser.add_argument('figures', nargs='*', help=f'any of {", ".join(figures)} (default: all)')
+    parser.add_argument('--dpi', type=float, default=None)
+    parser.add_argument('--formats', nargs='+', default=None)
+    parser.add_argument('-j', '--n-jobs', type=int, default=None)
+    args = parser.parse_args()
+    for figure_name in args.figures:
+        if figure_name not in figures:
+            parser.error(f'unknown figure: {figure_name}')
+    start_time = time.perf_counter()
+    render_times = render_all(
+        args.figures or None,
+        dpi=args.dpi,
+        formats=args.formats,
+        n_jobs=args.n_jobs,
+    )
+    for figure_name, t in render_times.items():
+        print(f'{figure_name:>24}: {t:6.2f} s')
+    print(f'{"total (wall)":>24}: {time.perf_counter() - start_time:6.2f} s')
\ No newline at end of file